@@ -19,6 +19,30 @@ def create_app(test_config=None):
         SECRET_KEY='dev',
         MONGO_URI=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'),
         MONGO_DB_NAME=os.environ.get('MONGO_DB_NAME', 'football_app'),
+        # 'mongo', or 'snapshot' to serve reads from SNAPSHOT_PATH without a database
+        DATA_BACKEND=os.environ.get('DATA_BACKEND', 'mongo'),
+        SNAPSHOT_PATH=os.environ.get('SNAPSHOT_PATH', os.path.join(app.instance_path, 'snapshot.bin')),
+        # Shared token event feeders send as "Authorization: Bearer <token>";
+        # POST /matches/<id>/events is disabled while it is unset
+        EVENTS_API_TOKEN=os.environ.get('EVENTS_API_TOKEN') or None,
+        # Live match feed (GET /matches/<id>/stream)
+        LIVE_FEED_POLL_INTERVAL=float(os.environ.get('LIVE_FEED_POLL_INTERVAL', 2)),
+        LIVE_FEED_QUEUE_SIZE=int(os.environ.get('LIVE_FEED_QUEUE_SIZE', 100)),
+        LIVE_FEED_HISTORY=500,
+        LIVE_FEED_HEARTBEAT=15,
+        LIVE_FEED_RETRY_MS=3000,
+        # Read cache, cleared when a new ingest completes
+        READ_CACHE_MAX_ENTRIES=int(os.environ.get('READ_CACHE_MAX_ENTRIES', 10000)),
+        READ_CACHE_VERSION_TTL=float(os.environ.get('READ_CACHE_VERSION_TTL', 5)),
+        # Documents fetched per round trip by /export cursors
+        EXPORT_BATCH_SIZE=1000,
+        # Read cache warm-up, started by the first request; GET /health/ready
+        # reports 503 until it ends or has run for WARMUP_TIMEOUT seconds
+        WARMUP_ENABLED=os.environ.get('WARMUP_ENABLED', '1') == '1',
+        WARMUP_TIMEOUT=float(os.environ.get('WARMUP_TIMEOUT', 10)),
+        WARMUP_TOP_N=int(os.environ.get('WARMUP_TOP_N', 50)),
+        WARMUP_ACCESS_LOG=os.environ.get('WARMUP_ACCESS_LOG', os.path.join(app.instance_path, 'access_log.json')),
+        WARMUP_LOG_FLUSH_INTERVAL=float(os.environ.get('WARMUP_LOG_FLUSH_INTERVAL', 60)),
     )
 
     if test_config is None:
@@ -38,10 +62,36 @@ def create_app(test_config=None):
     from . import db
     db.init_app(app)
 
+    # Open the snapshot when serving from one, register export-snapshot
+    from . import snapshot
+    snapshot.init_app(app)
+
+    # Register compact storage migration command
+    from . import compact
+    compact.init_app(app)
+
+    # Initialize read cache
+    from . import cache
+    cache.init_app(app)
+
+    # Initialize live match feed
+    from . import live_feed
+    live_feed.init_app(app)
+
+    # Record popular documents and warm the read cache with them
+    from . import warmup
+    warmup.init_app(app)
+
     # Register blueprints (controllers)
     from .controllers.matches import bp as matches_bp
     from .controllers.players import bp as players_bp
+    from .controllers.teams import bp as teams_bp
+    from .controllers.export import bp as export_bp
+    from .controllers.health import bp as health_bp
     app.register_blueprint(matches_bp)
     app.register_blueprint(players_bp)
+    app.register_blueprint(teams_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(health_bp)
 
     return app
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""ASGI serving mode for the match and player read endpoints.
+
+Serves GET /matches, /matches/<id> and /players/<id> from an async MongoDB
+client, so one worker process keeps many requests in flight while they wait
+on the database. Responses are byte-for-byte what the Flask app returns:
+the same services format them, they are serialized like `jsonify`, and the
+CORS headers are the ones Flask-CORS sends.
+
+Run with:
+
+    uvicorn --factory flaskr.asgi:create_asgi_app --workers 4
+"""
+import dataclasses
+import decimal
+import json
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date
+
+from pymongo import AsyncMongoClient
+from starlette.applications import Starlette
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware import Middleware
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import http_date
+
+from .services import AsyncMatchService, AsyncPlayerService
+
+
+def _default(o):
+    """Same fallbacks as Flask's default JSON provider."""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class JSONResponse(Response):
+    """JSON response serialized exactly like Flask's `jsonify` outside debug mode."""
+    media_type = 'application/json'
+
+    def render(self, content) -> bytes:
+        return (json.dumps(
+            content, default=_default, ensure_ascii=True, sort_keys=True, separators=(',', ':')
+        ) + '\n').encode('utf-8')
+
+
+# Methods Flask-CORS allows in preflight responses by default
+CORS_METHODS = 'DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT'
+
+
+class FlaskCORSMiddleware:
+    """
+    CORS headers as Flask-CORS sends them for `origins: "*"`.
+
+    Every response gets Access-Control-Allow-Origin: the request's Origin
+    echoed back (with Vary: Origin), or `*` when there is none. Starlette's
+    CORSMiddleware only adds the header when the request has an Origin.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        origin = request_headers.get('origin')
+
+        if scope['method'] == 'OPTIONS' and origin and 'access-control-request-method' in request_headers:
+            headers = {'Access-Control-Allow-Origin': origin, 'Access-Control-Allow-Methods': CORS_METHODS, 'Vary': 'Origin'}
+            if 'access-control-request-headers' in request_headers:
+                headers['Access-Control-Allow-Headers'] = request_headers['access-control-request-headers']
+            await Response(headers=headers)(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers['Access-Control-Allow-Origin'] = origin or '*'
+                if origin:
+                    headers.add_vary_header('Origin')
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+def _int_arg(request, name):
+    """Like Flask's `request.args.get(name, type=int)`: None when missing or invalid."""
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return None
+
+
+# Matches
+
+async def get_matches(request):
+    """
+    GET /matches?league_id=&season_id=
+    Fetch and return matches from MongoDB grouped by match day.
+    """
+    match_service = AsyncMatchService(request.app.state.db)
+
+    matches_by_day = await match_service.get_all_matches(
+        league_id=_int_arg(request, 'league_id'),
+        season_id=_int_arg(request, 'season_id')
+    )
+
+    return JSONResponse({'matches_by_day': matches_by_day}, status_code=200)
+
+
+async def get_match_details(request):
+    """
+    GET /matches/<match_id>
+    Fetch details for a specific match from MongoDB.
+    """
+    match_id = request.path_params['match_id']
+    match_service = AsyncMatchService(request.app.state.db)
+
+    match = await match_service.get_match_by_id(match_id)
+
+    if not match:
+        return JSONResponse({'error': f'Match {match_id} not found'}, status_code=404)
+
+    return JSONResponse(match, status_code=200)
+
+
+# Players
+
+async def get_player_details(request):
+    """
+    GET /players/<player_id>
+    Fetch details for a specific player from MongoDB.
+    """
+    player_id = request.path_params['player_id']
+    player_service = AsyncPlayerService(request.app.state.db)
+
+    player = await player_service.get_player_by_id(player_id)
+
+    if not player:
+        return JSONResponse({'error': f'Player {player_id} not found'}, status_code=404)
+
+    return JSONResponse(player, status_code=200)
+
+
+def create_asgi_app(test_config=None):
+    """
+    Create the ASGI app.
+
+    Reads MONGO_URI and MONGO_DB_NAME from the environment with the same
+    defaults as `create_app`; `test_config` overrides them.
+    """
+    config = {
+        'MONGO_URI': os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'),
+        'MONGO_DB_NAME': os.environ.get('MONGO_DB_NAME', 'football_app'),
+    }
+    config.update(test_config or {})
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # One pooled client per worker process, opened inside its event loop
+        client = AsyncMongoClient(config['MONGO_URI'])
+        app.state.db = client[config['MONGO_DB_NAME']]
+        try:
+            yield
+        finally:
+            await client.close()
+
+    routes = [
+        Route('/matches', get_matches, methods=['GET']),
+        Route('/matches/{match_id}', get_match_details, methods=['GET']),
+        Route('/players/{player_id}', get_player_details, methods=['GET']),
+    ]
+
+    return Starlette(
+        routes=routes,
+        middleware=[Middleware(FlaskCORSMiddleware)],
+        lifespan=lifespan
+    )
@@ -0,0 +1,160 @@
+"""In-process read cache that lives until the next completed ingest."""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from storage.meta import get_ingest_version
+from .db import get_write_log
+from .services import MatchService, PlayerService
+
+_MISSING = object()
+
+# Key kinds holding documents that API writes (POST events) can change
+WRITE_INVALIDATED_KINDS = ('match', 'player', 'matches', 'team_form', 'head_to_head')
+
+# Kinds logged as full keys; the write log holds key prefixes of the others
+# (goals change the listings and team results of many filters at once)
+EXACT_KEY_KINDS = ('match', 'player')
+
+
+class ReadCache:
+    """
+    LRU cache of computed responses, cleared whenever the ingest stamp in
+    the `meta` collection changes. Match and player documents touched by
+    API writes are dropped using the write log next to the write counter.
+
+    The stamps are re-read at most once every `version_ttl` seconds, so a
+    new ingest or write is picked up by every worker within that window.
+    """
+
+    def __init__(self, max_entries: int = 10000, version_ttl: float = 5.0):
+        """Initialize an empty cache."""
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self.entries = OrderedDict()
+        self.version = _MISSING
+        self.write_version = _MISSING
+        # Never checked: the first read always loads the stamps
+        self.checked_at = float('-inf')
+        self.lock = threading.Lock()
+
+    def _check_version(self, db, force=False):
+        """Drop stale entries if an ingest or API write happened since the last check."""
+        now = time.monotonic()
+        if not force and now - self.checked_at < self.version_ttl:
+            return
+
+        version = get_ingest_version(db)
+        write_version, writes = get_write_log(db)
+        with self.lock:
+            self.checked_at = now
+            if version != self.version:
+                self.entries.clear()
+            elif write_version != self.write_version:
+                self._drop_written(write_version, writes)
+            self.version = version
+            self.write_version = write_version
+
+    def _drop_written(self, write_version, writes):
+        """Drop the entries written since the last check (caller holds the lock)."""
+        missed = (write_version or 0) - (self.write_version or 0)
+        if 0 < missed <= len(writes):
+            for write in writes[-missed:]:
+                for key in write:
+                    self._drop(tuple(key))
+            return
+
+        # Fell behind the log (or the counter was reset): drop every written kind
+        for key in [k for k in self.entries if k[0] in WRITE_INVALIDATED_KINDS]:
+            del self.entries[key]
+
+    def _drop(self, key):
+        """Drop one entry, or every entry under a key prefix (caller holds the lock)."""
+        if key[0] in EXACT_KEY_KINDS:
+            self.entries.pop(key, None)
+            return
+        for k in [k for k in self.entries if k[:len(key)] == key]:
+            del self.entries[k]
+
+    def get(self, db, key):
+        """Return the cached value for `key`, or None."""
+        self._check_version(db)
+        with self.lock:
+            value = self.entries.get(key, _MISSING)
+            if value is _MISSING:
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, db, key, loader):
+        """
+        Return the cached value for `key`, computing it with `loader` on a miss.
+
+        None results are not cached, so "not found" is re-checked every time.
+        """
+        value = self.get(db, key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def ingest_version(self, db):
+        """Ingest stamp as of the last check, re-read at most once per `version_ttl`."""
+        self._check_version(db)
+        return self.version
+
+    def refresh(self, db):
+        """Check the ingest stamp and write log now, e.g. right after this worker wrote."""
+        self._check_version(db, force=True)
+
+
+def get_read_cache() -> ReadCache:
+    """Get the read cache for the current app."""
+    return current_app.extensions['read_cache']
+
+
+# Cached reads shared by the controllers and the boot warm-up (see warmup.py).
+# Keys: ('matches', league_id, season_id), ('match', match_id), ('player', player_id);
+# the teams controller adds ('team_form', team_id, n) and ('head_to_head', team_a, team_b)
+
+def load_match_listing(db, league_id=None, season_id=None):
+    """Cached GET /matches listing."""
+    return get_read_cache().get_or_load(
+        db, ('matches', league_id, season_id),
+        lambda: MatchService(db).get_all_matches(league_id=league_id, season_id=season_id)
+    )
+
+
+def load_match(db, match_id):
+    """Cached GET /matches/<id> document."""
+    return get_read_cache().get_or_load(
+        db, ('match', match_id),
+        lambda: MatchService(db).get_match_by_id(match_id)
+    )
+
+
+def load_player(db, player_id):
+    """Cached GET /players/<id> document."""
+    return get_read_cache().get_or_load(
+        db, ('player', player_id),
+        lambda: PlayerService(db).get_player_by_id(player_id)
+    )
+
+
+def init_app(app):
+    """Initialize the read cache with app."""
+    app.extensions['read_cache'] = ReadCache(
+        max_entries=app.config['READ_CACHE_MAX_ENTRIES'],
+        version_ttl=app.config['READ_CACHE_VERSION_TTL']
+    )
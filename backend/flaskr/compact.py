@@ -0,0 +1,72 @@
+"""`flask compact-matches`: migrate stored matches to (or from) the compact encoding.
+
+The codec itself is in storage/compact.py.
+"""
+import time
+
+import bson
+import click
+from flask.cli import with_appcontext
+from pymongo import ReplaceOne
+
+from storage.compact import encode_match, expand_match, is_compact
+
+
+@click.command('compact-matches')
+@click.option('--expand', is_flag=True, help='Convert compact documents back to the verbose shape.')
+@click.option('--dry-run', is_flag=True, help='Only report sizes and timings, do not write.')
+@click.option('--batch-size', default=500, show_default=True, help='Documents per bulk write.')
+@with_appcontext
+def compact_matches_command(expand, dry_run, batch_size):
+    """Migrate the matches collection to (or from) the compact encoding."""
+    from .db import get_db
+
+    matches_collection = get_db().matches
+    convert = expand_match if expand else encode_match
+
+    before_bytes = after_bytes = converted = 0
+    convert_seconds = expand_seconds = 0.0
+    batch = []
+
+    for match in matches_collection.find({}).batch_size(batch_size):
+        if is_compact(match) != expand:
+            continue
+
+        started = time.perf_counter()
+        new_match = convert(match)
+        convert_seconds += time.perf_counter() - started
+
+        # Cost of the read path: every API read of a compact match expands it
+        compact = match if expand else new_match
+        started = time.perf_counter()
+        expand_match(compact)
+        expand_seconds += time.perf_counter() - started
+
+        before_bytes += len(bson.encode(match))
+        after_bytes += len(bson.encode(new_match))
+        converted += 1
+
+        if not dry_run:
+            batch.append(ReplaceOne({'_id': match['_id']}, new_match))
+            if len(batch) >= batch_size:
+                matches_collection.bulk_write(batch, ordered=False)
+                batch = []
+
+    if batch:
+        matches_collection.bulk_write(batch, ordered=False)
+
+    if not converted:
+        click.echo('No documents to convert.')
+        return
+
+    click.echo(f"{'Would convert' if dry_run else 'Converted'} {converted} matches "
+               f"to the {'verbose' if expand else 'compact'} encoding")
+    click.echo(f"BSON size: {before_bytes:,} -> {after_bytes:,} bytes "
+               f"({after_bytes / before_bytes:.1%}, avg {before_bytes // converted:,} -> {after_bytes // converted:,} per match)")
+    click.echo(f"{'Expand' if expand else 'Encode'} time: {convert_seconds * 1e6 / converted:.0f} us/match, "
+               f"read-path expand time: {expand_seconds * 1e6 / converted:.0f} us/match")
+
+
+def init_app(app):
+    """Register the compact encoding commands with app."""
+    app.cli.add_command(compact_matches_command)
@@ -0,0 +1,37 @@
+"""Export controller for streaming bulk data as NDJSON."""
+import re
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from ..db import get_db
+from ..services import ExportService
+
+bp = Blueprint('export', __name__, url_prefix='/export')
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+@bp.route('/<any(matches, events, appearances):dataset>.ndjson', methods=['GET'])
+def export_dataset(dataset):
+    """
+    GET /export/{matches,events,appearances}.ndjson?date_from=&date_to=&league_id=&season_id=
+    Stream one JSON object per line from a batched cursor, so the export
+    is never held in memory.
+    """
+    filters = {
+        'date_from': request.args.get('date_from'),
+        'date_to': request.args.get('date_to'),
+        'league_id': request.args.get('league_id', type=int),
+        'season_id': request.args.get('season_id', type=int)
+    }
+    
+    for name in ('date_from', 'date_to'):
+        if filters[name] and not DATE_PATTERN.match(filters[name]):
+            return jsonify({'error': f'{name} must be YYYY-MM-DD'}), 400
+    
+    db = get_db()
+    export_service = ExportService(db, batch_size=current_app.config['EXPORT_BATCH_SIZE'])
+    
+    return Response(
+        stream_with_context(export_service.iter_ndjson(dataset, **filters)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={dataset}.ndjson'}
+    )
@@ -0,0 +1,16 @@
+"""Health controller for load balancer and orchestrator probes."""
+from flask import Blueprint, jsonify
+from ..warmup import get_warmup
+
+bp = Blueprint('health', __name__, url_prefix='/health')
+
+
+@bp.route('/ready', methods=['GET'])
+def get_readiness():
+    """
+    GET /health/ready
+    200 once the read cache warm-up has finished or timed out, 503 before.
+    """
+    warmup = get_warmup()
+    
+    return jsonify(warmup.status()), 200 if warmup.ready else 503
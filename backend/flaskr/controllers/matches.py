@@ -1,7 +1,12 @@
 """Matches controller for handling match-related endpoints."""
-from flask import Blueprint, jsonify
-from ..db import get_db
-from ..services import MatchService
+import hmac
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from ..cache import get_read_cache, load_match, load_match_listing
+from ..db import close_db, get_db
+from ..live_feed import format_sse, get_live_feed
+from ..services import EventService, MatchService
+from ..services.event_service import EventValidationError, validate_events
 
 bp = Blueprint('matches', __name__, url_prefix='/matches')
 
@@ -9,13 +14,17 @@ bp = Blueprint('matches', __name__, url_prefix='/matches')
 @bp.route('', methods=['GET'])
 def get_matches():
     """
-    GET /matches
-    Fetch and return matches from MongoDB grouped by match day.
+    GET /matches?league_id=&season_id=
+    Fetch and return matches from MongoDB grouped by match day, cached
+    until the next ingest.
     """
     db = get_db()
-    match_service = MatchService(db)
     
-    matches_by_day = match_service.get_all_matches()
+    matches_by_day = load_match_listing(
+        db,
+        league_id=request.args.get('league_id', type=int),
+        season_id=request.args.get('season_id', type=int)
+    )
     
     return jsonify({'matches_by_day': matches_by_day}), 200
 
@@ -24,14 +33,120 @@ def get_matches():
 def get_match_details(match_id):
     """
     GET /matches/<match_id>
-    Fetch details for a specific match from MongoDB.
+    Fetch details for a specific match from MongoDB, cached until the next
+    ingest or event write.
     """
     db = get_db()
-    match_service = MatchService(db)
     
-    match = match_service.get_match_by_id(match_id)
+    match = load_match(db, match_id)
     
     if not match:
         return jsonify({'error': f'Match {match_id} not found'}), 404
     
     return jsonify(match), 200
+
+
+@bp.route('/<string:match_id>/stream', methods=['GET'])
+def stream_match(match_id):
+    """
+    GET /matches/<match_id>/stream
+    Server-sent events with score updates and new or changed events.
+    Reconnecting clients resume from the Last-Event-ID header (or the
+    `last_event_id` query parameter); otherwise they get a snapshot first.
+    """
+    db = get_db()
+    match_service = MatchService(db)
+    
+    state = match_service.get_live_state(match_id)
+    
+    # The stream outlives the request: updates come from the match's single
+    # producer, so release this request's client before streaming
+    close_db()
+    
+    if state is None:
+        return jsonify({'error': f'Match {match_id} not found'}), 404
+    
+    feed = get_live_feed()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription, backlog = feed.subscribe(match_id, state, last_event_id)
+    heartbeat = current_app.config['LIVE_FEED_HEARTBEAT']
+    retry_ms = current_app.config['LIVE_FEED_RETRY_MS']
+    
+    # Uses plain values only, so the request context is not kept alive
+    def generate():
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            for message in backlog:
+                yield format_sse(message)
+            
+            while True:
+                # A dropped (too slow) subscriber ends the stream after what it
+                # already has queued; the client reconnects with Last-Event-ID
+                if subscription.dropped and subscription.queue.empty():
+                    return
+                message = subscription.get(timeout=heartbeat)
+                yield format_sse(message) if message else ': keep-alive\n\n'
+        finally:
+            feed.unsubscribe(match_id, subscription)
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def check_feeder_token():
+    """Error response unless the request carries the configured EVENTS_API_TOKEN."""
+    token = current_app.config['EVENTS_API_TOKEN']
+    if not token:
+        return jsonify({'error': 'Event ingestion is disabled on this server'}), 403
+    
+    scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(provided.strip().encode(), token.encode()):
+        return jsonify({'error': 'Missing or invalid feeder token'}), 401
+    
+    return None
+
+
+@bp.route('/<string:match_id>/events', methods=['POST'])
+def add_match_events(match_id):
+    """
+    POST /matches/<match_id>/events
+    Append a batch of events (a list, or {"events": [...]}) to a match.
+    Events already stored are skipped by id; player stats are updated.
+    Requires "Authorization: Bearer <EVENTS_API_TOKEN>".
+    """
+    denied = check_feeder_token()
+    if denied:
+        return denied
+    
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('events')
+    
+    events, errors = validate_events(payload)
+    if errors:
+        return jsonify({'error': 'Invalid events', 'details': errors}), 400
+    
+    db = get_db()
+    event_service = EventService(db)
+    
+    try:
+        result = event_service.add_events(match_id, events)
+    except EventValidationError as e:
+        return jsonify({'error': 'Invalid events', 'details': e.errors}), 400
+    
+    if result is None:
+        return jsonify({'error': f'Match {match_id} not found'}), 404
+    
+    if result['inserted']:
+        # This worker serves the new events right away; others within READ_CACHE_VERSION_TTL
+        get_read_cache().refresh(db)
+        
+        # Push the new events to live viewers without waiting for the next poll
+        live_state = MatchService(db).get_live_state(match_id)
+        if live_state is not None:
+            get_live_feed().publish_state(match_id, live_state)
+    
+    return jsonify(result), 201 if result['inserted'] else 200
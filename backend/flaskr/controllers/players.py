@@ -1,7 +1,9 @@
 """Players controller for handling player-related endpoints."""
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+from ..cache import load_player
 from ..db import get_db
-from ..services import PlayerService
+from ..services import SimilarityService
+from ..services.similarity_service import METRICS
 
 bp = Blueprint('players', __name__, url_prefix='/players')
 
@@ -10,14 +12,43 @@ bp = Blueprint('players', __name__, url_prefix='/players')
 def get_player_details(player_id):
     """
     GET /players/<player_id>
-    Fetch details for a specific player from MongoDB.
+    Fetch details for a specific player from MongoDB, cached until the next
+    ingest or event write.
     """
     db = get_db()
-    player_service = PlayerService(db)
     
-    player = player_service.get_player_by_id(player_id)
+    player = load_player(db, player_id)
     
     if not player:
         return jsonify({'error': f'Player {player_id} not found'}), 404
     
     return jsonify(player), 200
+
+
+@bp.route('/<string:player_id>/similar', methods=['GET'])
+def get_similar_players(player_id):
+    """
+    GET /players/<player_id>/similar?k=&metric=&position=&team_id=
+    Return the players with the nearest skill vectors.
+    """
+    k = request.args.get('k', 10, type=int)
+    metric = request.args.get('metric', 'cosine')
+    
+    if metric not in METRICS:
+        return jsonify({'error': f'Unknown metric {metric}, expected one of {", ".join(METRICS)}'}), 400
+    
+    db = get_db()
+    similarity_service = SimilarityService(db)
+    
+    similar = similarity_service.get_similar_players(
+        player_id,
+        k=k,
+        metric=metric,
+        position=request.args.get('position'),
+        team_id=request.args.get('team_id')
+    )
+    
+    if similar is None:
+        return jsonify({'error': f'Player {player_id} not found'}), 404
+    
+    return jsonify({'player_id': player_id, 'metric': metric, 'similar': similar}), 200
@@ -0,0 +1,49 @@
+"""Teams controller for handling team-related endpoints."""
+from flask import Blueprint, jsonify, request
+from ..cache import get_read_cache
+from ..db import get_db
+from ..services import TeamService
+
+bp = Blueprint('teams', __name__, url_prefix='/teams')
+
+
+@bp.route('/<string:team_id>/form', methods=['GET'])
+def get_team_form(team_id):
+    """
+    GET /teams/<team_id>/form?n=5
+    Fetch a team's last n results, cached until the next ingest.
+    """
+    n = max(1, min(request.args.get('n', 5, type=int), 50))
+    
+    db = get_db()
+    team_service = TeamService(db)
+    
+    form = get_read_cache().get_or_load(
+        db, ('team_form', team_id, n),
+        lambda: team_service.get_team_form(team_id, n)
+    )
+    
+    if not form:
+        return jsonify({'error': f'No matches found for team {team_id}'}), 404
+    
+    return jsonify(form), 200
+
+
+@bp.route('/<string:team_a>/vs/<string:team_b>', methods=['GET'])
+def get_head_to_head(team_a, team_b):
+    """
+    GET /teams/<team_a>/vs/<team_b>
+    Fetch every meeting between two teams, cached until the next ingest.
+    """
+    db = get_db()
+    team_service = TeamService(db)
+    
+    head_to_head = get_read_cache().get_or_load(
+        db, ('head_to_head', team_a, team_b),
+        lambda: team_service.get_head_to_head(team_a, team_b)
+    )
+    
+    if not head_to_head:
+        return jsonify({'error': f'No matches found between teams {team_a} and {team_b}'}), 404
+    
+    return jsonify(head_to_head), 200
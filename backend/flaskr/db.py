@@ -2,8 +2,15 @@ from pymongo import MongoClient
 from flask import current_app, g
 
 
+class SnapshotQueryUnsupported(RuntimeError):
+    """Raised for endpoints the snapshot backend cannot answer (returned as 501)."""
+
+
 def get_db():
-    """Get MongoDB database connection."""
+    """Get MongoDB database connection (or the snapshot, in snapshot mode)."""
+    if current_app.config['DATA_BACKEND'] == 'snapshot':
+        return current_app.extensions['snapshot']
+    
     if 'db' not in g:
         client = MongoClient(current_app.config['MONGO_URI'])
         g.db = client[current_app.config['MONGO_DB_NAME']]
@@ -20,3 +27,44 @@ def close_db(e=None):
 def init_app(app):
     """Initialize database with app."""
     app.teardown_appcontext(close_db)
+
+
+# Counter bumped by every API write to matches or players, next to a log of
+# the read cache keys each write touched, so every worker's read cache drops
+# just those documents, not only the worker that wrote.
+WRITES_META_ID = 'writes'
+
+# Writes kept in the log; a cache further behind drops all match and player entries
+WRITE_LOG_SIZE = 1000
+
+
+def get_write_log(db):
+    """
+    Return the API write counter and the most recent writes.
+
+    Returns:
+        (counter, writes), oldest write first, each write a list of
+        [kind, id] cache keys; (None, []) if nothing was written yet
+    """
+    meta = db.meta.find_one({'_id': WRITES_META_ID}, {'version': 1, 'changes': 1})
+    if not meta:
+        return None, []
+    return meta.get('version'), meta.get('changes', [])
+
+
+def bump_write_version(db, keys):
+    """
+    Record an API write to matches or players and the (kind, id) cache keys it touched.
+
+    Call it after the write is committed, outside its transaction: every
+    write updates this one document, so inside the transactions it would
+    make concurrent writes to different matches conflict.
+    """
+    db.meta.update_one(
+        {'_id': WRITES_META_ID},
+        {
+            '$inc': {'version': 1},
+            '$push': {'changes': {'$each': [[list(key) for key in keys]], '$slice': -WRITE_LOG_SIZE}}
+        },
+        upsert=True
+    )
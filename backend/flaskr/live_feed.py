@@ -0,0 +1,227 @@
+"""In-process pub/sub for live match updates streamed over server-sent events."""
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+# (event id, event type, payload)
+Message = Tuple[str, str, Dict]
+
+
+class Subscription:
+    """A single viewer's bounded message queue."""
+
+    def __init__(self, maxsize: int):
+        """Create an empty queue holding at most `maxsize` messages."""
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def put(self, message: Message) -> bool:
+        """Enqueue without blocking; a full queue drops the subscriber."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self.dropped = True
+            return False
+
+    def get(self, timeout: float) -> Optional[Message]:
+        """Wait up to `timeout` seconds for the next message."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MatchChannel:
+    """Fan-out for one match: a single producer, any number of subscribers."""
+
+    def __init__(self, match_id: str, stream_id: str, history: int):
+        """Initialize an empty channel."""
+        self.match_id = match_id
+        self.stream_id = stream_id
+        self.subscribers = set()
+        self.history = deque(maxlen=history)
+        self.seq = 0
+        self.state = None
+        self.producer = None
+        self.lock = threading.RLock()
+
+    def publish(self, event_type: str, data: Dict):
+        """Number the message, keep it for resuming and fan it out."""
+        with self.lock:
+            self.seq += 1
+            message = (f"{self.stream_id}-{self.seq}", event_type, data)
+            self.history.append(message)
+            for subscription in list(self.subscribers):
+                if not subscription.put(message):
+                    # Slow consumer: cut it loose, it resumes via Last-Event-ID
+                    self.subscribers.discard(subscription)
+
+    def replay_after(self, last_event_id: Optional[str]) -> Optional[List[Message]]:
+        """
+        Messages published after `last_event_id`.
+
+        Returns:
+            The missed messages, or None if the id is unknown or no longer
+            in the history buffer and the client needs a fresh snapshot
+        """
+        if not last_event_id:
+            return None
+
+        stream_id, _, seq = last_event_id.rpartition('-')
+        if stream_id != self.stream_id or not seq.isdigit() or int(seq) > self.seq:
+            return None
+
+        # History holds consecutive sequence numbers ending at self.seq
+        first_kept = self.seq - len(self.history) + 1
+        if int(seq) < first_kept - 1:
+            return None
+
+        return list(self.history)[int(seq) - first_kept + 1:]
+
+    def snapshot(self) -> Message:
+        """Full live state, tagged with the current position in the stream."""
+        return (f"{self.stream_id}-{self.seq}", 'snapshot', self.state)
+
+
+class LiveFeed:
+    """Registry of match channels and their polling producers."""
+
+    def __init__(self, app, poll_interval: float = 2.0, queue_size: int = 100, history: int = 500):
+        """Initialize the feed for a Flask app."""
+        self.app = app
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.history = history
+        # Event ids from another process (or before a restart) are not resumable
+        self.stream_id = uuid.uuid4().hex[:8]
+        self.channels: Dict[str, MatchChannel] = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, match_id: str, state: Dict,
+                  last_event_id: Optional[str] = None) -> Tuple[Subscription, List[Message]]:
+        """
+        Register a viewer for a match.
+
+        Args:
+            match_id: The match to follow
+            state: Current live state, used if the channel has none yet
+            last_event_id: Last event id the client saw, to resume from
+
+        Returns:
+            The subscription and the messages to send before live ones
+        """
+        subscription = Subscription(self.queue_size)
+
+        with self.lock:
+            channel = self.channels.get(match_id)
+            if channel is None:
+                channel = MatchChannel(match_id, self.stream_id, self.history)
+                self.channels[match_id] = channel
+            channel.lock.acquire()
+
+        try:
+            if channel.state is None:
+                channel.state = state
+            backlog = channel.replay_after(last_event_id)
+            if backlog is None:
+                backlog = [channel.snapshot()]
+            channel.subscribers.add(subscription)
+
+            if channel.producer is None or not channel.producer.is_alive():
+                channel.producer = threading.Thread(
+                    target=self._produce, args=(channel,), daemon=True,
+                    name=f'live-feed-{match_id}'
+                )
+                channel.producer.start()
+        finally:
+            channel.lock.release()
+
+        return subscription, backlog
+
+    def unsubscribe(self, match_id: str, subscription: Subscription):
+        """Remove a viewer; the producer stops once nobody is listening."""
+        channel = self.channels.get(match_id)
+        if channel is not None:
+            with channel.lock:
+                channel.subscribers.discard(subscription)
+
+    def publish_state(self, match_id: str, state: Dict):
+        """
+        Diff a match's live state against the last one seen and publish
+        only what changed.
+
+        Called by the polling producer, and directly by writers in this
+        process so their updates go out without waiting for the next poll.
+        """
+        channel = self.channels.get(match_id)
+        if channel is None:
+            return
+
+        with channel.lock:
+            previous = channel.state
+            channel.state = state
+
+            if previous is None:
+                return
+
+            if previous.get('score') != state.get('score'):
+                channel.publish('score', state.get('score'))
+
+            known = {event.get('id'): event for event in previous.get('events', [])}
+            for event in state.get('events', []):
+                if known.get(event.get('id')) != event:
+                    channel.publish('event', event)
+
+    def _produce(self, channel: MatchChannel):
+        """Poll the match for one channel until its last subscriber leaves."""
+        from .db import get_db
+        from .services import MatchService
+
+        with self.app.app_context():
+            match_service = MatchService(get_db())
+
+            while True:
+                time.sleep(self.poll_interval)
+                with self.lock, channel.lock:
+                    if not channel.subscribers:
+                        # Drop the channel so its history does not outlive the match
+                        self.channels.pop(channel.match_id, None)
+                        channel.producer = None
+                        return
+
+                try:
+                    state = match_service.get_live_state(channel.match_id)
+                except Exception as e:
+                    current_app.logger.warning(f"Live feed poll failed for match {channel.match_id}: {e}")
+                    continue
+
+                if state is not None:
+                    self.publish_state(channel.match_id, state)
+
+
+def format_sse(message: Message) -> str:
+    """Encode a message in the text/event-stream wire format."""
+    event_id, event_type, data = message
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def get_live_feed() -> LiveFeed:
+    """Get the live feed for the current app."""
+    return current_app.extensions['live_feed']
+
+
+def init_app(app):
+    """Initialize the live feed with app."""
+    app.extensions['live_feed'] = LiveFeed(
+        app,
+        poll_interval=app.config['LIVE_FEED_POLL_INTERVAL'],
+        queue_size=app.config['LIVE_FEED_QUEUE_SIZE'],
+        history=app.config['LIVE_FEED_HISTORY']
+    )
@@ -1,5 +1,9 @@
 """Services package for business logic."""
-from .match_service import MatchService
-from .player_service import PlayerService
+from .event_service import EventService
+from .export_service import ExportService
+from .match_service import AsyncMatchService, MatchService
+from .player_service import AsyncPlayerService, PlayerService
+from .similarity_service import SimilarityService
+from .team_service import TeamService
 
-__all__ = ['MatchService', 'PlayerService']
+__all__ = ['AsyncMatchService', 'AsyncPlayerService', 'EventService', 'ExportService', 'MatchService', 'PlayerService', 'SimilarityService', 'TeamService']
@@ -0,0 +1,268 @@
+"""Service layer for ingesting match events."""
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from storage.compact import compact_push_events, is_compact
+from ..db import bump_write_version
+
+# Event type -> counter in total_stats and matches_played entries
+EVENT_STAT_FIELDS = {
+    'goal': 'goals',
+    'yellow_card': 'yellow_cards',
+    'red_card': 'red_cards'
+}
+
+# Shape produced by extract_events_from_breakdown in utils/populate_db.py
+EVENT_FIELDS = ('id', 'minute', 'player_id', 'player_name', 'team_id', 'event_type', 'timestamp', 'video_timestamp')
+REQUIRED_EVENT_FIELDS = ('id', 'minute', 'player_id', 'team_id', 'event_type')
+
+MAX_EVENTS_PER_BATCH = 1000
+
+# Server error code for "transactions are not supported" (standalone mongod)
+ILLEGAL_OPERATION = 20
+
+
+class EventValidationError(ValueError):
+    """Events that are well-formed but do not fit the match they were posted to."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def _is_number(value, types=(int, float)) -> bool:
+    """isinstance check that rejects bools (a subclass of int)."""
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def validate_events(events) -> Tuple[List[Dict], List[str]]:
+    """
+    Check a batch of events and strip unknown keys.
+
+    Args:
+        events: Decoded JSON list of events
+
+    Returns:
+        The cleaned events and a list of validation errors
+    """
+    if not isinstance(events, list):
+        return [], ['Expected a list of events']
+    if len(events) > MAX_EVENTS_PER_BATCH:
+        return [], [f'At most {MAX_EVENTS_PER_BATCH} events per request']
+
+    cleaned = []
+    errors = []
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            errors.append(f'events[{index}]: expected an object')
+            continue
+
+        missing = [field for field in REQUIRED_EVENT_FIELDS if event.get(field) is None]
+        if missing:
+            errors.append(f"events[{index}]: missing {', '.join(missing)}")
+            continue
+        if not isinstance(event['event_type'], str) or event['event_type'] not in EVENT_STAT_FIELDS:
+            errors.append(f"events[{index}]: unknown event_type {event['event_type']!r}")
+            continue
+        ids = [field for field in ('id', 'player_id', 'team_id') if not (isinstance(event[field], str) or _is_number(event[field], int))]
+        if ids:
+            errors.append(f"events[{index}]: {', '.join(ids)} must be a string or an integer")
+            continue
+        if not _is_number(event['minute'], int) or event['minute'] < 0:
+            errors.append(f'events[{index}]: minute must be a non-negative integer')
+            continue
+        timestamps = [field for field in ('timestamp', 'video_timestamp') if event.get(field) is not None and not _is_number(event[field])]
+        if timestamps:
+            errors.append(f"events[{index}]: {', '.join(timestamps)} must be a number")
+            continue
+        if event.get('player_name') is not None and not isinstance(event['player_name'], str):
+            errors.append(f'events[{index}]: player_name must be a string')
+            continue
+
+        cleaned_event = {field: event[field] for field in EVENT_FIELDS if field in event}
+        cleaned_event['id'] = str(cleaned_event['id'])
+        cleaned.append(cleaned_event)
+
+    return cleaned, errors
+
+
+class EventService:
+    """Service for appending events to matches and updating player stats."""
+
+    def __init__(self, db):
+        """Initialize with database connection."""
+        self.db = db
+        self.matches_collection = db.matches
+        self.players_collection = db.players
+
+    def _run_in_transaction(self, operation):
+        """Run `operation(session)` atomically when the deployment supports it."""
+        try:
+            with self.db.client.start_session() as session:
+                return session.with_transaction(operation)
+        except OperationFailure as e:
+            if e.code != ILLEGAL_OPERATION:
+                raise
+        # Standalone server: same writes, in order, without a transaction
+        return operation(None)
+
+    def _player_updates(self, match_id: str, events: List[Dict]) -> List[UpdateOne]:
+        """One stats update per affected player, counting all their new events."""
+        counts = Counter((str(e['player_id']), EVENT_STAT_FIELDS[e['event_type']]) for e in events)
+
+        increments = {}
+        for (player_id, field), count in counts.items():
+            inc = increments.setdefault(player_id, {})
+            inc[f'total_stats.{field}'] = count
+            inc[f'matches_played.$.{field}'] = count
+
+        # Like populate_players, only appearances in this match are counted
+        return [
+            UpdateOne({'_id': player_id, 'matches_played.match_id': match_id}, {'$inc': inc})
+            for player_id, inc in increments.items()
+        ]
+
+    @staticmethod
+    def _score_update(match: Dict, events: List[Dict]) -> Tuple[Dict, Dict]:
+        """
+        Filter and update adding new goals to the match score.
+
+        A score that is still unset is set instead of incremented (`$inc`
+        fails on null); the filter pins it to null, so a concurrent goal
+        makes the write match nothing.
+        """
+        match_info = match.get('match_info', {})
+        home_team_id = str(match_info.get('home_team', {}).get('id'))
+
+        goals = Counter(
+            'home_score' if str(event['team_id']) == home_team_id else 'away_score'
+            for event in events if event['event_type'] == 'goal'
+        )
+
+        query, update = {}, {}
+        for field, count in goals.items():
+            if match_info.get(field) is None:
+                query[f'match_info.{field}'] = None
+                update.setdefault('$set', {})[f'match_info.{field}'] = count
+            else:
+                update.setdefault('$inc', {})[f'match_info.{field}'] = count
+        return query, update
+
+    @staticmethod
+    def _cache_keys(match: Dict, events: List[Dict]) -> List[Tuple]:
+        """
+        Read cache keys (see flaskr/cache.py) that new events make stale.
+
+        Goals also change the score shown by every listing and by both
+        teams' form and head-to-head entries, logged as key prefixes.
+        """
+        keys = [('match', match['_id'])]
+        keys += [('player', player_id) for player_id in sorted({str(event['player_id']) for event in events})]
+        if any(event['event_type'] == 'goal' for event in events):
+            match_info = match.get('match_info', {})
+            keys.append(('matches',))
+            keys += [('team_form', str(match_info.get(side, {}).get('id'))) for side in ('home_team', 'away_team')]
+            keys.append(('head_to_head',))
+        return keys
+
+    def add_events(self, match_id: str, events: List[Dict]) -> Optional[Dict]:
+        """
+        Append a validated batch of events to a match.
+
+        Events whose id is already stored (or repeated in the batch) are
+        skipped. New events are appended with a single $push/$each, which
+        also adds new goals to the score, and the affected players' stats
+        are updated with one ordered bulk write.
+
+        Args:
+            match_id: The unique identifier for the match
+            events: Events as returned by validate_events
+
+        Returns:
+            Counts of received, inserted and duplicate events, or None if
+            the match is not found
+
+        Raises:
+            EventValidationError: An event's team_id is not one of the match's teams
+        """
+        # De-duplicate within the batch, first occurrence wins
+        batch = []
+        seen_ids = set()
+        for event in events:
+            if event['id'] not in seen_ids:
+                seen_ids.add(event['id'])
+                batch.append(event)
+
+        def write(session):
+            match = self.matches_collection.find_one(
+                {'_id': match_id},
+                {
+                    'events.id': 1, '_fmt': 1, 'ev.id': 1, 'names': 1, 'tm': 1,
+                    'match_info.home_team.id': 1, 'match_info.away_team.id': 1,
+                    'match_info.home_score': 1, 'match_info.away_score': 1
+                },
+                session=session
+            )
+            if match is None:
+                return None
+
+            match_info = match.get('match_info', {})
+            team_ids = {str(match_info.get(side, {}).get('id')) for side in ('home_team', 'away_team')}
+            errors = [
+                f"events[{index}]: team_id {event['team_id']!r} does not play in match {match_id}"
+                for index, event in enumerate(events) if str(event['team_id']) not in team_ids
+            ]
+            if errors:
+                raise EventValidationError(errors)
+
+            if is_compact(match):
+                existing_ids = set(match.get('ev', {}).get('id', []))
+            else:
+                existing_ids = {event.get('id') for event in match.get('events', [])}
+            new_events = [event for event in batch if event['id'] not in existing_ids]
+            if not new_events:
+                return [], 0, []
+
+            # The $nin guard makes a concurrent insert of the same ids a no-op
+            if is_compact(match):
+                query, update = compact_push_events(match, new_events)
+            else:
+                query = {'_id': match_id, 'events.id': {'$nin': [event['id'] for event in new_events]}}
+                update = {'$push': {'events': {'$each': new_events, '$sort': {'minute': 1}}}}
+            score_query, score_update = self._score_update(match, new_events)
+            query.update(score_query)
+            update.update(score_update)
+            result = self.matches_collection.update_one(query, update, session=session)
+            if result.matched_count == 0:
+                return write(session)
+
+            players_updated = 0
+            player_updates = self._player_updates(match_id, new_events)
+            if player_updates:
+                players_updated = self.players_collection.bulk_write(
+                    player_updates, ordered=True, session=session
+                ).modified_count
+
+            return new_events, players_updated, self._cache_keys(match, new_events)
+
+        written = self._run_in_transaction(write)
+
+        if written is None:
+            return None
+
+        inserted, players_updated, touched = written
+
+        if inserted:
+            # Read caches (this worker's and the others') drop what the events changed
+            bump_write_version(self.db, touched)
+
+        return {
+            'match_id': match_id,
+            'received': len(events),
+            'inserted': len(inserted),
+            'duplicates': len(events) - len(inserted),
+            'players_updated': players_updated
+        }
@@ -0,0 +1,149 @@
+"""Service layer for streaming bulk exports."""
+import itertools
+import json
+from typing import Dict, Iterator, Optional
+
+from storage.compact import EVENTS_PROJECTION, expand_events
+from .match_service import MatchService
+
+EXPORT_DATASETS = ('matches', 'events', 'appearances')
+
+
+class ExportService:
+    """Service producing export rows straight from batched Mongo cursors."""
+
+    def __init__(self, db, batch_size: int = 1000):
+        """Initialize with database connection."""
+        self.db = db
+        self.matches_collection = db.matches
+        self.players_collection = db.players
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _match_query(date_field: str, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                     league_id: Optional[int] = None, season_id: Optional[int] = None) -> Dict:
+        """Filter on match date and league/season."""
+        query = {}
+        if league_id is not None:
+            query['league_id'] = league_id
+        if season_id is not None:
+            query['season_id'] = season_id
+
+        # Dates are stored as YYYY-MM-DD strings, so they compare lexically
+        date_range = {}
+        if date_from:
+            date_range['$gte'] = date_from
+        if date_to:
+            date_range['$lte'] = date_to
+        if date_range:
+            query[date_field] = date_range
+
+        return query
+
+    def iter_matches(self, **filters) -> Iterator[Dict]:
+        """One row per match."""
+        cursor = self.matches_collection.find(
+            self._match_query('match_info.match_date', **filters),
+            {'_id': 1, 'league_id': 1, 'season_id': 1, 'match_info': 1}
+        ).batch_size(self.batch_size)
+
+        def rows():
+            for match in cursor:
+                row = MatchService.format_match(match)
+                row['league_id'] = match.get('league_id')
+                row['season_id'] = match.get('season_id')
+                row['competition_name'] = match.get('match_info', {}).get('competition_name')
+                yield row
+
+        return rows()
+
+    def iter_events(self, **filters) -> Iterator[Dict]:
+        """One row per event, with its match's id, date and league."""
+        query = self._match_query('match_info.match_date', **filters)
+        # Skip matches without events entirely (verbose or compact)
+        query['$or'] = [{'events.0': {'$exists': True}}, {'ev.id.0': {'$exists': True}}]
+
+        cursor = self.matches_collection.find(query, {
+            '_id': 1,
+            'league_id': 1,
+            'season_id': 1,
+            'match_info.match_date': 1,
+            **EVENTS_PROJECTION
+        }).batch_size(self.batch_size)
+
+        def rows():
+            for match in cursor:
+                for event in expand_events(match):
+                    row = {
+                        'match_id': match['_id'],
+                        'league_id': match.get('league_id'),
+                        'season_id': match.get('season_id'),
+                        'match_date': match.get('match_info', {}).get('match_date')
+                    }
+                    row.update(event)
+                    yield row
+
+        return rows()
+
+    def iter_appearances(self, **filters) -> Iterator[Dict]:
+        """One row per player appearance (an entry of `matches_played`)."""
+        pipeline = [
+            {'$project': {'name': 1, 'position': 1, 'matches_played': 1}},
+            {'$unwind': '$matches_played'}
+        ]
+        query = self._match_query('match_date', **filters)
+        if query:
+            # Skip players with no matching appearance before unwinding the rest
+            pipeline.insert(0, {'$match': {'matches_played': {'$elemMatch': query}}})
+            pipeline.append({'$match': {f'matches_played.{key}': value for key, value in query.items()}})
+
+        cursor = self.players_collection.aggregate(
+            pipeline, allowDiskUse=True, batchSize=self.batch_size
+        )
+
+        def rows():
+            for player in cursor:
+                row = {
+                    'player_id': player['_id'],
+                    'player_name': player.get('name'),
+                    'position': player.get('position')
+                }
+                row.update(player['matches_played'])
+                yield row
+
+        return rows()
+
+    def iter_ndjson(self, dataset: str, chunk_size: int = 64 * 1024, **filters) -> Iterator[str]:
+        """
+        Serialize a dataset as newline-delimited JSON.
+
+        Lines are grouped into chunks of roughly `chunk_size` characters so
+        the response is written in a few large pieces instead of one per row.
+        The first batch is fetched before returning (find cursors are lazy),
+        so query errors surface before the response starts streaming; only
+        a failure on a later batch can still truncate it.
+        """
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f'Unknown export dataset {dataset}')
+        rows = getattr(self, f'iter_{dataset}')(**filters)
+
+        first = next(rows, None)
+        if first is None:
+            return iter(())
+        return self._chunks(itertools.chain([first], rows), chunk_size)
+
+    @staticmethod
+    def _chunks(rows: Iterator[Dict], chunk_size: int) -> Iterator[str]:
+        chunk = []
+        size = 0
+        for row in rows:
+            line = json.dumps(row, default=str, ensure_ascii=False) + '\n'
+            chunk.append(line)
+            size += len(line)
+            if size >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+
+        if chunk:
+            yield ''.join(chunk)
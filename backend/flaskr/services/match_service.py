@@ -1,6 +1,13 @@
 """Service layer for match-related business logic."""
+from collections import defaultdict
 from typing import Dict, List, Optional
 
+from storage.compact import EVENTS_PROJECTION, expand_events, expand_match
+from ..snapshot import SnapshotDatabase, listing_key
+
+# Fields needed to build match listing entries
+LISTING_PROJECTION = {'_id': 1, 'match_info': 1}
+
 
 class MatchService:
     """Service for handling match data operations."""
@@ -10,21 +17,53 @@ class MatchService:
         self.db = db
         self.matches_collection = db.matches
     
-    def get_all_matches(self) -> Dict[str, List[Dict]]:
+    @staticmethod
+    def format_match(match: Dict) -> Dict:
         """
-        Fetch all matches and group them by match day.
+        Build the compact match summary used by match lists.
         
+        Args:
+            match: Match document with at least `_id` and `match_info`
+            
         Returns:
-            Dictionary with dates as keys and match lists as values
+            Match summary dictionary for the frontend
         """
-        from collections import defaultdict
+        match_info = match.get('match_info', {})
         
-        # Fetch all matches from MongoDB
-        matches = list(self.matches_collection.find({}, {
-            '_id': 1,
-            'match_info': 1
-        }))
+        return {
+            'id': match['_id'],
+            'home_team': match_info.get('home_team', {}),
+            'away_team': match_info.get('away_team', {}),
+            'home_score': match_info.get('home_score', 0),
+            'away_score': match_info.get('away_score', 0),
+            'match_date': match_info.get('match_date'),
+            'kickoff_time': match_info.get('kickoff_time'),
+            'status': match_info.get('status', 'scheduled'),
+            'stadium': match_info.get('stadium'),
+            'pixellot_id': match_info.get('pixellot_id')
+        }
+    
+    @staticmethod
+    def listing_query(league_id: Optional[int] = None, season_id: Optional[int] = None) -> Dict:
+        """Filter for the match listing, served by the (league_id, season_id, match_date) index."""
+        query = {}
+        if league_id is not None:
+            query['league_id'] = league_id
+        if season_id is not None:
+            query['season_id'] = season_id
+        return query
+    
+    @classmethod
+    def group_by_day(cls, matches: List[Dict]) -> Dict[str, List[Dict]]:
+        """
+        Format listing documents and group them by match day.
         
+        Args:
+            matches: Match documents with `_id` and `match_info`
+            
+        Returns:
+            Dictionary with dates as keys and match lists as values
+        """
         if not matches:
             return {}
         
@@ -32,22 +71,9 @@ class MatchService:
         matches_by_day = defaultdict(list)
         
         for match in matches:
-            match_info = match.get('match_info', {})
-            match_date = match_info.get('match_date')
-            
             # Format the match for frontend
-            formatted_match = {
-                'id': match['_id'],
-                'home_team': match_info.get('home_team', {}),
-                'away_team': match_info.get('away_team', {}),
-                'home_score': match_info.get('home_score', 0),
-                'away_score': match_info.get('away_score', 0),
-                'match_date': match_date,
-                'kickoff_time': match_info.get('kickoff_time'),
-                'status': match_info.get('status', 'scheduled'),
-                'stadium': match_info.get('stadium'),
-                'pixellot_id': match_info.get('pixellot_id')
-            }
+            formatted_match = cls.format_match(match)
+            match_date = formatted_match['match_date']
             
             if match_date:
                 matches_by_day[match_date].append(formatted_match)
@@ -57,21 +83,19 @@ class MatchService:
         
         return sorted_matches_by_day
     
-    def get_match_by_id(self, match_id: str) -> Optional[Dict]:
+    @staticmethod
+    def format_match_details(match: Dict) -> Dict:
         """
-        Fetch details for a specific match.
+        Build the match details response from a stored match document.
         
         Args:
-            match_id: The unique identifier for the match
+            match: Match document in either storage encoding
             
         Returns:
-            Match details dictionary or None if not found
+            Match details dictionary for the frontend
         """
-        # Fetch match from MongoDB
-        match = self.matches_collection.find_one({'_id': match_id})
-        
-        if not match:
-            return None
+        # Matches may be stored in the compact encoding
+        match = expand_match(match)
         
         # Format response for frontend
         response = {
@@ -85,3 +109,110 @@ class MatchService:
         }
         
         return response
+    
+    def get_all_matches(self, league_id: Optional[int] = None,
+                        season_id: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Fetch all matches and group them by match day.
+        
+        Args:
+            league_id: Only include matches from this league
+            season_id: Only include matches from this season
+            
+        Returns:
+            Dictionary with dates as keys and match lists as values
+        """
+        if isinstance(self.db, SnapshotDatabase):
+            # Filters with no matches are not stored in the snapshot
+            return self.db.get_body('listings', listing_key(league_id, season_id)) or {}
+        
+        # Fetch all matches from MongoDB
+        matches = list(self.matches_collection.find(
+            self.listing_query(league_id, season_id), LISTING_PROJECTION
+        ))
+        
+        return self.group_by_day(matches)
+    
+    def get_match_by_id(self, match_id: str) -> Optional[Dict]:
+        """
+        Fetch details for a specific match.
+        
+        Args:
+            match_id: The unique identifier for the match
+            
+        Returns:
+            Match details dictionary or None if not found
+        """
+        if isinstance(self.db, SnapshotDatabase):
+            return self.db.get_body('matches', match_id)
+        
+        # Fetch match from MongoDB
+        match = self.matches_collection.find_one({'_id': match_id})
+        
+        if not match:
+            return None
+        
+        return self.format_match_details(match)
+    
+    def get_live_state(self, match_id: str) -> Optional[Dict]:
+        """
+        Fetch only the parts of a match that change during a live game.
+        
+        Args:
+            match_id: The unique identifier for the match
+            
+        Returns:
+            Dictionary with score/status and events, or None if not found
+        """
+        match = self.matches_collection.find_one({'_id': match_id}, {
+            'match_info.home_score': 1,
+            'match_info.away_score': 1,
+            'match_info.status': 1,
+            **EVENTS_PROJECTION
+        })
+        
+        if not match:
+            return None
+        
+        match_info = match.get('match_info', {})
+        
+        return {
+            'score': {
+                'home_score': match_info.get('home_score'),
+                'away_score': match_info.get('away_score'),
+                'status': match_info.get('status')
+            },
+            'events': expand_events(match)
+        }
+
+
+class AsyncMatchService:
+    """
+    Match reads for the ASGI app: the same queries and formatting as
+    MatchService (shared through its static helpers), awaited on an async
+    driver. It only has the reads the ASGI app serves, so no sync method
+    can be called on an async collection by mistake.
+    """
+    
+    def __init__(self, db):
+        """Initialize with an async database connection."""
+        self.db = db
+        self.matches_collection = db.matches
+    
+    async def get_all_matches(self, league_id: Optional[int] = None,
+                              season_id: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """Async version of MatchService.get_all_matches."""
+        matches = await self.matches_collection.find(
+            MatchService.listing_query(league_id, season_id), LISTING_PROJECTION
+        ).to_list()
+        
+        return MatchService.group_by_day(matches)
+    
+    async def get_match_by_id(self, match_id: str) -> Optional[Dict]:
+        """Async version of MatchService.get_match_by_id."""
+        match = await self.matches_collection.find_one({'_id': match_id})
+        
+        if not match:
+            return None
+        
+        return MatchService.format_match_details(match)
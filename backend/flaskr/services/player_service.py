@@ -1,6 +1,8 @@
 """Service layer for player-related business logic."""
 from typing import Optional, Dict
 
+from ..snapshot import SnapshotDatabase
+
 
 class PlayerService:
     """Service for handling player data operations."""
@@ -20,7 +22,25 @@ class PlayerService:
         Returns:
             Player details dictionary or None if not found
         """
+        if isinstance(self.db, SnapshotDatabase):
+            return self.db.get_body('players', player_id)
+        
         # Fetch player from MongoDB
         player = self.players_collection.find_one({'_id': player_id})
         
         return player
+
+
+class AsyncPlayerService:
+    """Player reads for the ASGI app, awaited on an async driver."""
+    
+    def __init__(self, db):
+        """Initialize with an async database connection."""
+        self.db = db
+        self.players_collection = db.players
+    
+    async def get_player_by_id(self, player_id: str) -> Optional[Dict]:
+        """Async version of PlayerService.get_player_by_id."""
+        player = await self.players_collection.find_one({'_id': player_id})
+        
+        return player
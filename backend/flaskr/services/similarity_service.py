@@ -0,0 +1,156 @@
+"""Service layer for skill-based player similarity search."""
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from storage.skills import SKILL_CATEGORIES
+
+METRICS = ('cosine', 'euclidean')
+
+# Most results a single search returns
+MAX_K = 100
+
+
+class SkillIndex:
+    """Precomputed matrix of every player's skill vector."""
+
+    def __init__(self, players: List[Dict], version=None):
+        """Build the matrix and the filter columns from player documents."""
+        self.version = version
+        self.ids = np.array([str(p['_id']) for p in players], dtype=object)
+        self.positions = np.array([p.get('position') or 'Unknown' for p in players], dtype=object)
+        self.team_ids = np.array([str(p.get('team_id')) for p in players], dtype=object)
+        self.players = players
+        self.row_by_id = {player_id: row for row, player_id in enumerate(self.ids)}
+
+        self.matrix = np.array(
+            [[p.get('skills', {}).get(skill, 0) for skill in SKILL_CATEGORIES] for p in players],
+            dtype=np.float32
+        ).reshape(len(players), len(SKILL_CATEGORIES))
+
+        # Unit-length rows so cosine distance is a single matrix-vector product
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.unit_matrix = self.matrix / norms
+
+    def search(self, player_id: str, k: int = 10, metric: str = 'cosine',
+               position: Optional[str] = None, team_id: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Find the k players nearest to the given player.
+
+        Args:
+            player_id: The player to compare against
+            k: Number of results to return
+            metric: 'cosine' or 'euclidean'
+            position: Only consider players with this position
+            team_id: Only consider players from this team
+
+        Returns:
+            List of player summaries ordered by distance, or None if the
+            player is not in the index
+        """
+        if metric not in METRICS:
+            raise ValueError(f'Unknown metric {metric}')
+
+        row = self.row_by_id.get(str(player_id))
+        if row is None:
+            return None
+
+        # Restrict candidates to the requested filters, never the player itself
+        mask = np.ones(len(self.ids), dtype=bool)
+        if position:
+            mask &= self.positions == position
+        if team_id:
+            mask &= self.team_ids == str(team_id)
+        mask[row] = False
+        candidates = np.flatnonzero(mask)
+
+        if candidates.size == 0 or k <= 0:
+            return []
+
+        # One vectorized pass over the candidate rows
+        if metric == 'euclidean':
+            diff = self.matrix[candidates] - self.matrix[row]
+            distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        else:
+            distances = 1.0 - self.unit_matrix[candidates] @ self.unit_matrix[row]
+
+        # argpartition gives the top-k unordered; only those k get sorted
+        k = min(k, candidates.size)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind='stable')]
+
+        results = []
+        for index in top:
+            player = self.players[candidates[index]]
+            results.append({
+                'id': str(player['_id']),
+                'name': player.get('name'),
+                'position': player.get('position'),
+                'team_id': player.get('team_id'),
+                'team_name': player.get('team_name'),
+                'skills': player.get('skills', {}),
+                'distance': round(float(distances[index]), 6)
+            })
+
+        return results
+
+
+# Process-wide index shared by all requests, rebuilt when the ingest stamp changes
+_index: Optional[SkillIndex] = None
+_index_lock = threading.Lock()
+
+
+class SimilarityService:
+    """Service for finding players with similar skill profiles."""
+
+    def __init__(self, db):
+        """Initialize with database connection."""
+        self.db = db
+        self.players_collection = db.players
+
+    def get_index(self) -> SkillIndex:
+        """Return the skill index, rebuilding it if a new ingest has completed."""
+        global _index
+        # Imported here: the cache module imports this package's services
+        from ..cache import get_read_cache
+
+        # The read cache's ingest stamp, re-read at most once per READ_CACHE_VERSION_TTL
+        version = get_read_cache().ingest_version(self.db)
+        index = _index
+        if index is not None and index.version == version:
+            return index
+
+        with _index_lock:
+            # Another request may have rebuilt it while we waited
+            if _index is None or _index.version != version:
+                players = list(self.players_collection.find({}, {
+                    '_id': 1,
+                    'name': 1,
+                    'position': 1,
+                    'team_id': 1,
+                    'team_name': 1,
+                    'skills': 1
+                }))
+                _index = SkillIndex(players, version)
+            return _index
+
+    def get_similar_players(self, player_id: str, k: int = 10, metric: str = 'cosine',
+                            position: Optional[str] = None,
+                            team_id: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Find the players whose skill vectors are nearest to the given player.
+
+        Args:
+            player_id: The unique identifier for the player
+            k: Number of results to return, clamped to 1..MAX_K
+            metric: 'cosine' or 'euclidean'
+            position: Optional position filter
+            team_id: Optional team filter
+
+        Returns:
+            List of similar players or None if the player is not found
+        """
+        k = max(1, min(k, MAX_K))
+        return self.get_index().search(player_id, k, metric, position, team_id)
@@ -0,0 +1,147 @@
+"""Service layer for team-related business logic."""
+from typing import Dict, List, Optional
+
+from .match_service import MatchService
+
+# Newest first; served by the (team id, kickoff_time) indexes created at ingest
+KICKOFF_DESC = [('match_info.kickoff_time', -1)]
+
+
+def team_id_values(team_id: str) -> List:
+    """Team ids are stored as strings or ints depending on the source."""
+    values = [team_id]
+    if team_id.isdigit():
+        values.append(int(team_id))
+    return values
+
+
+class TeamService:
+    """Service for handling team data operations."""
+
+    def __init__(self, db):
+        """Initialize with database connection."""
+        self.db = db
+        self.matches_collection = db.matches
+
+    @staticmethod
+    def _result_for(match: Dict, team_ids: List) -> Optional[str]:
+        """'W', 'D' or 'L' from the team's point of view, None if unplayed."""
+        home_score = match.get('home_score')
+        away_score = match.get('away_score')
+        if home_score is None or away_score is None:
+            return None
+
+        if match.get('home_team', {}).get('id') in team_ids:
+            goals_for, goals_against = home_score, away_score
+        else:
+            goals_for, goals_against = away_score, home_score
+
+        if goals_for > goals_against:
+            return 'W'
+        if goals_for < goals_against:
+            return 'L'
+        return 'D'
+
+    @staticmethod
+    def _team_name(match: Dict, team_ids: List) -> Optional[str]:
+        for side in ('home_team', 'away_team'):
+            team = match.get(side, {})
+            if team.get('id') in team_ids:
+                return team.get('name')
+        return None
+
+    def get_team_form(self, team_id: str, n: int = 5) -> Optional[Dict]:
+        """
+        Fetch a team's last n results.
+
+        Args:
+            team_id: The unique identifier for the team
+            n: Number of played matches to return
+
+        Returns:
+            Recent matches with results and a summary, or None if the team
+            has no matches
+        """
+        ids = team_id_values(team_id)
+
+        cursor = self.matches_collection.find({
+            '$or': [
+                {'match_info.home_team.id': {'$in': ids}},
+                {'match_info.away_team.id': {'$in': ids}}
+            ],
+            'match_info.home_score': {'$ne': None},
+            'match_info.away_score': {'$ne': None}
+        }, {'_id': 1, 'match_info': 1}).sort(KICKOFF_DESC).limit(n)
+
+        matches = [MatchService.format_match(match) for match in cursor]
+
+        if not matches:
+            return None
+
+        summary = {'played': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'goals_for': 0, 'goals_against': 0}
+        for match in matches:
+            match['result'] = self._result_for(match, ids)
+            is_home = match['home_team'].get('id') in ids
+            summary['played'] += 1
+            summary['wins'] += match['result'] == 'W'
+            summary['draws'] += match['result'] == 'D'
+            summary['losses'] += match['result'] == 'L'
+            summary['goals_for'] += match['home_score'] if is_home else match['away_score']
+            summary['goals_against'] += match['away_score'] if is_home else match['home_score']
+
+        # Oldest to newest, the way form guides are read
+        summary['form'] = ''.join(match['result'] for match in reversed(matches))
+
+        return {
+            'team_id': team_id,
+            'team_name': self._team_name(matches[0], ids),
+            'matches': matches,
+            'summary': summary
+        }
+
+    def get_head_to_head(self, team_a: str, team_b: str) -> Optional[Dict]:
+        """
+        Fetch every meeting between two teams.
+
+        Args:
+            team_a: The first team's identifier
+            team_b: The second team's identifier
+
+        Returns:
+            Meetings (newest first) with a summary, or None if they never met
+        """
+        ids_a = team_id_values(team_a)
+        ids_b = team_id_values(team_b)
+
+        cursor = self.matches_collection.find({
+            '$or': [
+                {'match_info.home_team.id': {'$in': ids_a}, 'match_info.away_team.id': {'$in': ids_b}},
+                {'match_info.home_team.id': {'$in': ids_b}, 'match_info.away_team.id': {'$in': ids_a}}
+            ]
+        }, {'_id': 1, 'match_info': 1}).sort(KICKOFF_DESC)
+
+        matches = [MatchService.format_match(match) for match in cursor]
+
+        if not matches:
+            return None
+
+        summary = {'played': 0, 'team_a_wins': 0, 'team_b_wins': 0, 'draws': 0, 'team_a_goals': 0, 'team_b_goals': 0}
+        for match in matches:
+            # Result from team A's point of view
+            match['result'] = self._result_for(match, ids_a)
+            if match['result'] is None:
+                continue
+            a_is_home = match['home_team'].get('id') in ids_a
+            summary['played'] += 1
+            summary['team_a_wins'] += match['result'] == 'W'
+            summary['team_b_wins'] += match['result'] == 'L'
+            summary['draws'] += match['result'] == 'D'
+            summary['team_a_goals'] += match['home_score'] if a_is_home else match['away_score']
+            summary['team_b_goals'] += match['away_score'] if a_is_home else match['home_score']
+
+        return {
+            'team_a': {'id': team_a, 'name': self._team_name(matches[0], ids_a)},
+            'team_b': {'id': team_b, 'name': self._team_name(matches[0], ids_b)},
+            'matches': matches,
+            'summary': summary
+        }
@@ -0,0 +1,235 @@
+"""Read-only snapshot backend: serve the API from a memory-mapped file.
+
+Snapshot file layout:
+
+    MAGIC (8 bytes) | index offset (8) | index length (8) | blobs ... | index
+
+Every blob is a response body (or the `matches_by_day` of a listing),
+rendered as JSON at export time. The index is a JSON object mapping section
+(`listings`, `matches`, `players`) -> key -> [offset, length].
+
+In snapshot mode `get_db` returns a SnapshotDatabase. MatchService and
+PlayerService read their pre-rendered bodies from it, wrapped in RawJSON,
+and the app's JSON provider writes those out as-is: the controllers route
+and shape the responses as usual, without a JSON round trip per request.
+Any other query raises SnapshotQueryUnsupported, returned as 501.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+
+import click
+from flask import current_app, jsonify, request
+from flask.cli import with_appcontext
+from flask.json.provider import DefaultJSONProvider
+from pymongo import MongoClient
+
+from storage.meta import INGEST_META_ID, get_ingest_version
+from .db import SnapshotQueryUnsupported
+
+MAGIC = b'FBSNAP03'
+HEADER = struct.Struct('<8sQQ')
+
+
+def listing_key(league_id=None, season_id=None) -> str:
+    """Index key of the GET /matches listing for one league/season filter."""
+    return f"{'' if league_id is None else league_id}:{'' if season_id is None else season_id}"
+
+
+class RawJSON:
+    """JSON text rendered at export time, written into responses without re-encoding."""
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class SnapshotJSONProvider(DefaultJSONProvider):
+    """The default provider, except that RawJSON values are written out as-is."""
+
+    def dumps(self, obj, **kwargs):
+        if isinstance(obj, RawJSON):
+            return obj.text
+        # e.g. {'matches_by_day': RawJSON}: lay the object out like json.dumps would
+        if isinstance(obj, dict) and any(isinstance(value, RawJSON) for value in obj.values()):
+            item_separator, key_separator = kwargs.get('separators') or (', ', ': ')
+            return '{' + item_separator.join(
+                f'{super(SnapshotJSONProvider, self).dumps(str(key))}{key_separator}{self.dumps(value, **kwargs)}'
+                for key, value in sorted(obj.items())
+            ) + '}'
+        return super().dumps(obj, **kwargs)
+
+
+class SnapshotStore:
+    """A memory-mapped snapshot file and its index."""
+
+    def __init__(self, path: str):
+        """Map the file and load its index."""
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_offset, index_length = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file (re-run export-snapshot)")
+
+        index = json.loads(self.mmap[index_offset:index_offset + index_length])
+        self.sections = index['sections']
+        self.created_at = index.get('created_at')
+        self.ingest_version = index.get('ingest_version')
+
+    def get_blob(self, section: str, key) -> bytes:
+        """Blob stored under a key, or None if it is not in the snapshot."""
+        location = self.sections.get(section, {}).get(str(key))
+        if location is None:
+            return None
+        offset, length = location
+        return self.mmap[offset:offset + length]
+
+
+class SnapshotCollection:
+    """
+    A collection of the snapshot database.
+
+    Only the ingest stamp in `meta` can be read (so the read cache works
+    unchanged); every other query raises SnapshotQueryUnsupported.
+    """
+
+    def __init__(self, store: SnapshotStore, name: str):
+        self.store = store
+        self.name = name
+
+    def find_one(self, filter=None, *args, **kwargs):
+        if self.name == 'meta' and set(filter or {}) == {'_id'}:
+            if filter['_id'] == INGEST_META_ID and self.store.ingest_version is not None:
+                return {'_id': INGEST_META_ID, 'version': self.store.ingest_version}
+            return None
+        raise SnapshotQueryUnsupported(f'queries on {self.name}')
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        raise SnapshotQueryUnsupported(f'{name} on {self.name}')
+
+
+class SnapshotDatabase:
+    """Database-like object over a snapshot, returned by `get_db` in snapshot mode."""
+
+    def __init__(self, store: SnapshotStore):
+        self.store = store
+
+    def get_body(self, section: str, key):
+        """Pre-rendered body as RawJSON, or None if it is not in the snapshot."""
+        blob = self.store.get_blob(section, key)
+        return RawJSON(blob.decode('utf-8')) if blob is not None else None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return SnapshotCollection(self.store, name)
+
+    def __getitem__(self, name):
+        return SnapshotCollection(self.store, name)
+
+
+def render_bodies(db):
+    """
+    Yield (section, key, body) for every body the snapshot serves.
+
+    Listings are rendered for every combination of the stored league and
+    season ids, unfiltered included; filters with no matches are left out.
+    """
+    # Imported here: the services import this module for SnapshotDatabase
+    from .services import MatchService
+
+    match_service = MatchService(db)
+
+    league_ids = [None] + sorted(db.matches.distinct('league_id'))
+    season_ids = [None] + sorted(db.matches.distinct('season_id'))
+    for league_id in league_ids:
+        for season_id in season_ids:
+            matches_by_day = match_service.get_all_matches(league_id=league_id, season_id=season_id)
+            if matches_by_day or (league_id is None and season_id is None):
+                yield 'listings', listing_key(league_id, season_id), matches_by_day
+
+    for match in db.matches.find({}).batch_size(1000):
+        yield 'matches', match['_id'], MatchService.format_match_details(match)
+
+    for player in db.players.find({}).batch_size(1000):
+        yield 'players', player['_id'], player
+
+
+def write_snapshot(db, path: str):
+    """
+    Render the listing, match and player responses into a snapshot file.
+
+    Must run inside an app context: bodies are serialized by the app's JSON
+    provider, so responses match `jsonify` byte for byte. The file is written
+    next to `path` and renamed over it when complete, so readers never map
+    a partial snapshot.
+
+    Returns:
+        Body count per section
+    """
+    tmp_path = f"{path}.tmp"
+    sections = {'listings': {}, 'matches': {}, 'players': {}}
+
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+
+        for section, key, body in render_bodies(db):
+            blob = current_app.json.dumps(body, separators=(',', ':')).encode('utf-8')
+            sections[section][str(key)] = [f.tell(), len(blob)]
+            f.write(blob)
+
+        index = json.dumps({
+            'sections': sections,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'ingest_version': get_ingest_version(db)
+        }).encode('utf-8')
+        index_offset = f.tell()
+        f.write(index)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, index_offset, len(index)))
+
+    os.replace(tmp_path, path)
+    return {section: len(locations) for section, locations in sections.items()}
+
+
+@click.command('export-snapshot')
+@click.argument('path', type=click.Path(dir_okay=False))
+@with_appcontext
+def export_snapshot_command(path):
+    """Render the match listings, matches and players to a snapshot file."""
+    # Always read from MongoDB, even when the app itself serves a snapshot
+    client = MongoClient(current_app.config['MONGO_URI'])
+    try:
+        counts = write_snapshot(client[current_app.config['MONGO_DB_NAME']], path)
+    finally:
+        client.close()
+
+    summary = ', '.join(f'{count} {section}' for section, count in counts.items())
+    click.echo(f"Wrote snapshot {path} ({summary}, {os.path.getsize(path):,} bytes)")
+
+
+def init_app(app):
+    """Open the configured snapshot (if any) and register the export command."""
+    app.cli.add_command(export_snapshot_command)
+
+    if app.config['DATA_BACKEND'] != 'snapshot':
+        return
+
+    app.extensions['snapshot'] = SnapshotDatabase(SnapshotStore(app.config['SNAPSHOT_PATH']))
+    app.json = SnapshotJSONProvider(app)
+
+    @app.before_request
+    def reject_writes():
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return jsonify({'error': 'This server is a read-only snapshot'}), 405
+
+    @app.errorhandler(SnapshotQueryUnsupported)
+    def snapshot_query_unsupported(e):
+        return jsonify({'error': f'Not available in snapshot mode: {e}'}), 501
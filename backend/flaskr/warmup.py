@@ -0,0 +1,202 @@
+"""Warm the read cache when a worker starts serving, and record what to warm next time."""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, request
+
+from .cache import load_match, load_match_listing, load_player
+from .db import get_db
+
+# Endpoint -> (access log kind, view arg holding the document id)
+LOGGED_ENDPOINTS = {
+    'matches.get_match_details': ('match', 'match_id'),
+    'players.get_player_details': ('player', 'player_id')
+}
+
+
+class AccessLog:
+    """
+    Per-document request counts, merged into a JSON file shared by workers.
+
+    Counts are kept in memory and flushed at most every `flush_interval`
+    seconds. Concurrent flushes from several workers can lose an interval
+    of counts; the log only needs to rank documents, not count exactly.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 60.0, max_keys: int = 1000):
+        """Initialize with the file counts are merged into."""
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, document_id: str):
+        """Count one successful request for a document."""
+        with self.lock:
+            self.pending[f'{kind}:{document_id}'] += 1
+            due = time.monotonic() - self.flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def load(self) -> Counter:
+        """Counts stored in the log file (empty if there is none yet)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return Counter(json.load(f))
+        except (OSError, ValueError):
+            return Counter()
+
+    def flush(self):
+        """Merge pending counts into the log file."""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        counts = self.load()
+        counts.update(pending)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(counts.most_common(self.max_keys)), f)
+        os.replace(tmp_path, self.path)
+
+    def most_requested(self, kind: str, n: int):
+        """Ids of the n most requested documents of a kind."""
+        prefix = f'{kind}:'
+        ranked = [key[len(prefix):] for key, _ in self.load().most_common() if key.startswith(prefix)]
+        return ranked[:n]
+
+
+class WarmUp:
+    """Warm-up state of this worker, reported by GET /health/ready."""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.done = threading.Event()
+        self.started_at = None
+        self.seconds = None
+        self.loaded = {'listings': 0, 'matches': 0, 'players': 0}
+        self.error = None
+        self.lock = threading.Lock()
+
+    @property
+    def timed_out(self) -> bool:
+        """Still running `timeout` seconds after it started."""
+        return (not self.done.is_set() and self.started_at is not None
+                and time.monotonic() - self.started_at >= self.timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self.done.is_set() or self.timed_out
+
+    def start(self, app):
+        """Start warming the cache in the background, once."""
+        if self.started_at is not None or self.done.is_set():
+            return
+        with self.lock:
+            if self.started_at is not None:
+                return
+            self.started_at = time.monotonic()
+        threading.Thread(target=warm_cache, args=(app, self), name='cache-warmup', daemon=True).start()
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'warmed': self.done.is_set(),
+            'timed_out': self.timed_out,
+            'seconds': self.seconds,
+            'loaded': self.loaded,
+            'error': self.error
+        }
+
+
+def recent_match_ids(db, n):
+    """Ids of the n matches with the latest kickoff."""
+    cursor = db.matches.find({}, {'_id': 1}).sort([('match_info.kickoff_time', -1)]).limit(n)
+    return [match['_id'] for match in cursor]
+
+
+def recent_player_ids(db, n):
+    """Ids of the n players with the latest appearance (matches_played is newest first)."""
+    cursor = db.players.find({}, {'_id': 1}).sort([('matches_played.0.match_date', -1)]).limit(n)
+    return [player['_id'] for player in cursor]
+
+
+def warm_cache(app, state: WarmUp):
+    """
+    Preload the match listing and the top matches and players into the cache.
+
+    Documents come from the access log when it has any, topped up with the
+    most recent ones.
+    """
+    n = app.config['WARMUP_TOP_N']
+    access_log = app.extensions['access_log']
+    started = time.perf_counter()
+
+    try:
+        with app.app_context():
+            db = get_db()
+
+            load_match_listing(db)
+            state.loaded['listings'] += 1
+
+            for kind, counter, recent_ids, load in (
+                ('match', 'matches', recent_match_ids, load_match),
+                ('player', 'players', recent_player_ids, load_player)
+            ):
+                ids = access_log.most_requested(kind, n)
+                if len(ids) < n:
+                    ids += [i for i in recent_ids(db, n) if i not in ids][:n - len(ids)]
+                for document_id in ids:
+                    if load(db, document_id) is not None:
+                        state.loaded[counter] += 1
+    except Exception as e:
+        state.error = str(e)
+        app.logger.warning(f"Cache warm-up failed: {e}")
+    finally:
+        state.seconds = round(time.perf_counter() - started, 3)
+        if state.seconds > state.timeout:
+            app.logger.warning(f"Cache warm-up took {state.seconds}s, reported ready after {state.timeout}s")
+        state.done.set()
+
+
+def get_warmup() -> WarmUp:
+    """Get the warm-up state for the current app."""
+    return current_app.extensions['warmup']
+
+
+def init_app(app):
+    """Record document accesses and warm the read cache once the app serves requests."""
+    access_log = AccessLog(
+        app.config['WARMUP_ACCESS_LOG'],
+        flush_interval=app.config['WARMUP_LOG_FLUSH_INTERVAL']
+    )
+    app.extensions['access_log'] = access_log
+    atexit.register(access_log.flush)
+    state = app.extensions['warmup'] = WarmUp(timeout=app.config['WARMUP_TIMEOUT'])
+
+    @app.after_request
+    def record_access(response):
+        logged = LOGGED_ENDPOINTS.get(request.endpoint)
+        if logged and response.status_code == 200:
+            kind, view_arg = logged
+            access_log.record(kind, request.view_args[view_arg])
+        return response
+
+    # Snapshot reads never touch a database, so there is nothing to warm
+    if not app.config['WARMUP_ENABLED'] or app.config['DATA_BACKEND'] == 'snapshot':
+        state.done.set()
+        return
+
+    # Started by the first request (typically the /health/ready probe) rather
+    # than here, so CLI commands and apps that never serve do not wait on MongoDB
+    @app.before_request
+    def start_warmup():
+        state.start(app)
@@ -0,0 +1 @@
+"""Storage formats shared by the Flask app (flaskr) and the ingest scripts (utils)."""
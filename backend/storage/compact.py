@@ -0,0 +1,287 @@
+"""Compact on-disk encoding for match lineups and events.
+
+A compact match document keeps `match_info` (and every other top-level
+field) untouched, and replaces `lineups`/`events` with:
+
+    _fmt   COMPACT_FORMAT marker
+    names  lookup table of player names used by lineups and events
+    tm     lookup table of team ids used by events
+    lu     {'h'|'a': {'s': rows, 'b': rows}} starting 11 (s) and bench (b);
+           row = [id, shirt_number, name, name_en, position, flags, game_time]
+           where name/name_en index `names` (-1 = none)
+    ev     events as parallel arrays keyed by EVENT_KEYS values
+
+`expand_match` turns it back into the shape the API has always returned.
+
+Pure Python with no dependencies, so the Flask app and the ingest scripts
+in utils/ share it. The migration command lives in flaskr/compact.py.
+"""
+COMPACT_FORMAT = 1
+
+# Event type enum, stored as the index into this list
+EVENT_TYPES = ['goal', 'yellow_card', 'red_card']
+
+# Event field -> parallel array key
+EVENT_KEYS = {
+    'id': 'id',
+    'minute': 'mi',
+    'player_id': 'p',
+    'player_name': 'n',
+    'team_id': 't',
+    'event_type': 'k',
+    'timestamp': 'ts',
+    'video_timestamp': 'vt'
+}
+
+# Event fields that may be missing; stored as None and dropped again on expand
+OPTIONAL_EVENT_FIELDS = ('player_name', 'timestamp', 'video_timestamp')
+
+# Lineup row flags
+CAPTAIN = 1
+HAS_NAME_EN = 2
+HAS_GAME_TIME = 4
+
+SIDES = {'home': 'h', 'away': 'a'}
+GROUPS = {'first_11': 's', 'substitutes': 'b'}
+
+# Fields of a compact document that replace `lineups` and `events`
+COMPACT_FIELDS = ('_fmt', 'names', 'tm', 'lu', 'ev')
+
+
+def is_compact(match):
+    """Whether a match document uses the compact encoding."""
+    return match.get('_fmt') == COMPACT_FORMAT
+
+
+class LookupTable:
+    """Append-only value -> index lookup table."""
+
+    def __init__(self, values=None):
+        self.values = list(values or [])
+        self.index = {value: i for i, value in enumerate(self.values)}
+
+    def add(self, value):
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+
+def encode_events(events, names, teams):
+    """
+    Encode events as parallel arrays.
+
+    Args:
+        events: Events in the API shape
+        names: LookupTable of player names, extended in place
+        teams: LookupTable of team ids, extended in place
+
+    Returns:
+        Dictionary of parallel arrays keyed by EVENT_KEYS values
+    """
+    columns = {key: [] for key in EVENT_KEYS.values()}
+
+    for event in events:
+        event_type = event.get('event_type')
+        player_name = event.get('player_name')
+        columns['id'].append(event.get('id'))
+        columns['mi'].append(event.get('minute'))
+        columns['p'].append(event.get('player_id'))
+        columns['n'].append(names.add(player_name) if player_name is not None else -1)
+        columns['t'].append(teams.add(event.get('team_id')))
+        columns['k'].append(EVENT_TYPES.index(event_type) if event_type in EVENT_TYPES else event_type)
+        columns['ts'].append(event.get('timestamp'))
+        columns['vt'].append(event.get('video_timestamp'))
+
+    return columns
+
+
+def encode_match(match):
+    """
+    Convert a match document to the compact encoding.
+
+    Args:
+        match: Match document in the verbose shape
+
+    Returns:
+        New compact match document (the input is not modified)
+    """
+    if is_compact(match):
+        return match
+
+    names = LookupTable()
+    match_info = match.get('match_info', {})
+    teams = LookupTable([
+        match_info.get('home_team', {}).get('id'),
+        match_info.get('away_team', {}).get('id')
+    ])
+
+    lineups = match.get('lineups') or {}
+    compact_lineups = {}
+    for side, side_key in SIDES.items():
+        compact_lineups[side_key] = {}
+        for group, group_key in GROUPS.items():
+            rows = []
+            for player in lineups.get(side, {}).get(group, []):
+                flags = CAPTAIN if player.get('captain') else 0
+                name_en = -1
+                if 'name_en' in player:
+                    flags |= HAS_NAME_EN
+                    if player['name_en'] is not None:
+                        name_en = names.add(player['name_en'])
+                if 'game_time' in player:
+                    flags |= HAS_GAME_TIME
+                name = player.get('name')
+                rows.append([
+                    player.get('id'),
+                    player.get('shirt_number'),
+                    names.add(name) if name is not None else -1,
+                    name_en,
+                    player.get('position'),
+                    flags,
+                    player.get('game_time')
+                ])
+            compact_lineups[side_key][group_key] = rows
+
+    compact = {key: value for key, value in match.items() if key not in ('lineups', 'events')}
+    compact['ev'] = encode_events(match.get('events', []), names, teams)
+    compact['lu'] = compact_lineups
+    compact['names'] = names.values
+    compact['tm'] = teams.values
+    compact['_fmt'] = COMPACT_FORMAT
+
+    return compact
+
+
+def compact_push_events(match, events):
+    """
+    Build the write that appends events to a compact match.
+
+    Args:
+        match: The stored match with at least `_id`, `names` and `tm`
+        events: New events in the API shape
+
+    Returns:
+        (filter, update) for update_one. The filter pins the current size
+        of both lookup tables, so a concurrent append that grew them makes
+        this write match nothing instead of storing wrong indexes.
+    """
+    stored_names = match.get('names', [])
+    stored_teams = match.get('tm', [])
+    names = LookupTable(stored_names)
+    teams = LookupTable(stored_teams)
+    columns = encode_events(events, names, teams)
+
+    push = {f'ev.{key}': {'$each': values} for key, values in columns.items()}
+    if len(names.values) > len(stored_names):
+        push['names'] = {'$each': names.values[len(stored_names):]}
+    if len(teams.values) > len(stored_teams):
+        push['tm'] = {'$each': teams.values[len(stored_teams):]}
+
+    query = {
+        '_id': match['_id'],
+        'ev.id': {'$nin': columns['id']},
+        'names': {'$size': len(stored_names)},
+        'tm': {'$size': len(stored_teams)}
+    }
+    return query, {'$push': push}
+
+
+def events_size_filter(match):
+    """
+    Filter matching a stored match only while it has as many events as `match`.
+
+    Args:
+        match: The stored match, read with at least EVENTS_PROJECTION
+
+    Returns:
+        Query fragment to combine with the `_id` filter of a write
+    """
+    if is_compact(match):
+        return {'ev.id': {'$size': len(match.get('ev', {}).get('id', []))}}
+    if 'events' not in match:
+        return {'events': {'$exists': False}}
+    return {'events': {'$size': len(match['events'])}}
+
+
+def expand_events(match):
+    """Events of a match document in the API shape, sorted by minute."""
+    if not is_compact(match):
+        return match.get('events', [])
+
+    names = match.get('names', [])
+    teams = match.get('tm', [])
+    columns = match.get('ev', {})
+
+    events = []
+    for i, event_id in enumerate(columns.get('id', [])):
+        event_type = columns['k'][i]
+        name_index = columns['n'][i]
+        event = {
+            'id': event_id,
+            'minute': columns['mi'][i],
+            'player_id': columns['p'][i],
+            'player_name': names[name_index] if name_index >= 0 else None,
+            'team_id': teams[columns['t'][i]],
+            'event_type': EVENT_TYPES[event_type] if isinstance(event_type, int) else event_type,
+            'timestamp': columns['ts'][i],
+            'video_timestamp': columns['vt'][i]
+        }
+        for field in OPTIONAL_EVENT_FIELDS:
+            if event[field] is None:
+                del event[field]
+        events.append(event)
+
+    # Appends go to the end of the arrays, so order is restored here
+    events.sort(key=lambda x: x.get('minute', 0))
+    return events
+
+
+def expand_lineups(match):
+    """Lineups of a match document in the API shape, or None if absent."""
+    if not is_compact(match):
+        return match.get('lineups')
+
+    names = match.get('names', [])
+    lineups = {}
+    for side, side_key in SIDES.items():
+        lineups[side] = {}
+        for group, group_key in GROUPS.items():
+            players = []
+            for player_id, shirt_number, name, name_en, position, flags, game_time in \
+                    match.get('lu', {}).get(side_key, {}).get(group_key, []):
+                player = {
+                    'id': player_id,
+                    'name': names[name] if name >= 0 else None
+                }
+                if flags & HAS_NAME_EN:
+                    player['name_en'] = names[name_en] if name_en >= 0 else None
+                player['shirt_number'] = shirt_number
+                player['position'] = position
+                player['captain'] = bool(flags & CAPTAIN)
+                if flags & HAS_GAME_TIME:
+                    player['game_time'] = game_time
+                players.append(player)
+            lineups[side][group] = players
+    return lineups
+
+
+def expand_match(match):
+    """
+    Convert a compact match document back to the verbose shape.
+
+    Verbose documents are returned unchanged.
+    """
+    if not is_compact(match):
+        return match
+
+    expanded = {key: value for key, value in match.items() if key not in COMPACT_FIELDS}
+    lineups = expand_lineups(match)
+    if lineups is not None:
+        expanded['lineups'] = lineups
+    expanded['events'] = expand_events(match)
+    return expanded
+
+
+# Projection for reading only the events of either encoding
+EVENTS_PROJECTION = {'events': 1, '_fmt': 1, 'ev': 1, 'names': 1, 'tm': 1}
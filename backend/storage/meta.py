@@ -0,0 +1,22 @@
+"""Version stamps in the `meta` collection, written by the ingest scripts and read by the API."""
+from datetime import datetime
+
+# Document in the `meta` collection stamped by the ingest scripts once a run
+# completes. In-process indexes and the read cache compare against it to
+# know when to rebuild.
+INGEST_META_ID = 'ingest'
+
+
+def get_ingest_version(db):
+    """Return the version stamp of the last completed ingest, or None."""
+    meta = db.meta.find_one({'_id': INGEST_META_ID}, {'version': 1})
+    return meta.get('version') if meta else None
+
+
+def stamp_ingest_version(db, **counts):
+    """Stamp a completed ingest run (with e.g. `matches=` or `players=` counts)."""
+    db.meta.update_one(
+        {'_id': INGEST_META_ID},
+        {'$set': {'version': datetime.utcnow().isoformat(), **counts}},
+        upsert=True
+    )
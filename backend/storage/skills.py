@@ -0,0 +1,4 @@
+"""Player skill attributes, generated at ingest and compared by the similarity search."""
+
+# Skill categories for radar charts; also the order of the similarity skill vector
+SKILL_CATEGORIES = ['passing', 'dribbling', 'speed', 'strength', 'vision', 'defending']
@@ -0,0 +1,12 @@
+"""Put backend/ on sys.path so tests import `flaskr` and `storage` like the app does.
+
+utils/ goes on the path as well, for the ingest scripts' modules.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (os.path.join(BACKEND_DIR, 'utils'), BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
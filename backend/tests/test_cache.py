@@ -0,0 +1,108 @@
+"""Tests for the read cache's write log handling (flaskr/cache.py)."""
+from flaskr.cache import ReadCache
+
+
+class FakeMeta:
+    """The `meta` collection: the ingest stamp and a write log of `log_size` writes."""
+
+    def __init__(self, log_size=1000):
+        self.log_size = log_size
+        self.documents = {'ingest': {'_id': 'ingest', 'version': 'v1'}}
+        self.reads = 0
+
+    def find_one(self, query, projection=None):
+        self.reads += 1
+        return self.documents.get(query['_id'])
+
+    def log(self, *writes):
+        meta = self.documents.setdefault('writes', {'_id': 'writes', 'version': 0, 'changes': []})
+        meta['version'] += len(writes)
+        meta['changes'] = (meta['changes'] + [[list(key) for key in keys] for keys in writes])[-self.log_size:]
+
+
+class FakeDatabase:
+    def __init__(self, log_size=1000):
+        self.meta = FakeMeta(log_size)
+
+
+def filled_cache(db, keys, version_ttl=0):
+    cache = ReadCache(version_ttl=version_ttl)
+    cache.get(db, ('warm',))
+    for key in keys:
+        cache.set(key, 'value')
+    return cache
+
+
+def test_goal_prefixes_drop_listings_and_team_entries():
+    db = FakeDatabase()
+    cache = filled_cache(db, [
+        ('matches', None, None), ('matches', 726, 26), ('team_form', '10', 5), ('team_form', '30', 5),
+        ('head_to_head', '10', '30'), ('match', 'm1'), ('match', 'm2')
+    ])
+
+    db.meta.log([('match', 'm1'), ('matches',), ('team_form', '10'), ('team_form', '20'), ('head_to_head',)])
+    cache.refresh(db)
+
+    assert list(cache.entries) == [('team_form', '30', 5), ('match', 'm2')]
+
+
+ENTRIES = [('matches', None, None), ('match', 'm1'), ('match', 'm2'), ('match', 'm3'), ('player', 'p1'), ('player', 'p2')]
+
+
+def test_missed_writes_drop_only_their_keys():
+    db = FakeDatabase()
+    db.meta.log([('match', 'm3')])
+    cache = filled_cache(db, ENTRIES)
+
+    # m3 was written before the cache looked: only the two newer writes apply
+    db.meta.log([('match', 'm1'), ('player', 'p1')], [('match', 'm2')])
+    cache.refresh(db)
+
+    assert list(cache.entries) == [('matches', None, None), ('match', 'm3'), ('player', 'p2')]
+
+
+def test_log_wrapped_past_the_cache_drops_every_written_kind():
+    db = FakeDatabase(log_size=2)
+    cache = filled_cache(db, ENTRIES + [('other', 'x')])
+
+    # Three writes since the last check, the log only holds the last two
+    db.meta.log([('match', 'm1')], [('match', 'm2')], [('player', 'p1')])
+    cache.refresh(db)
+
+    assert list(cache.entries) == [('other', 'x')]
+
+
+def test_counter_reset_drops_every_written_kind():
+    db = FakeDatabase()
+    db.meta.log([('match', 'm1')], [('match', 'm2')])
+    cache = filled_cache(db, [('match', 'm3'), ('other', 'x')])
+
+    db.meta.documents['writes'] = {'_id': 'writes', 'version': 1, 'changes': [[['match', 'm1']]]}
+    cache.refresh(db)
+
+    assert list(cache.entries) == [('other', 'x')]
+
+
+def test_new_ingest_clears_everything():
+    db = FakeDatabase()
+    cache = filled_cache(db, ENTRIES + [('other', 'x')])
+
+    db.meta.documents['ingest']['version'] = 'v2'
+    db.meta.log([('match', 'm1')])
+    cache.refresh(db)
+
+    assert list(cache.entries) == []
+    assert (cache.version, cache.write_version) == ('v2', 1)
+
+
+def test_stamps_are_read_at_most_once_per_ttl():
+    db = FakeDatabase()
+    cache = filled_cache(db, ENTRIES, version_ttl=60)
+    reads = db.meta.reads
+
+    db.meta.log([('match', 'm1')])
+    assert cache.get(db, ('match', 'm1')) == 'value'
+    assert db.meta.reads == reads
+
+    cache.refresh(db)
+    assert cache.get(db, ('match', 'm1')) is None
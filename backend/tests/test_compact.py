@@ -0,0 +1,144 @@
+"""Tests for the compact match encoding (storage/compact.py)."""
+import copy
+
+from storage.compact import (
+    COMPACT_FORMAT,
+    compact_push_events,
+    encode_match,
+    expand_match,
+    is_compact
+)
+
+
+def make_match():
+    """A verbose match with every optional lineup and event field exercised."""
+    return {
+        '_id': '1061429',
+        'league_id': 726,
+        'season_id': 26,
+        'match_info': {
+            'match_date': '2024-08-10',
+            'home_team': {'id': 10, 'name': 'Home'},
+            'away_team': {'id': 20, 'name': 'Away'}
+        },
+        'lineups': {
+            'home': {
+                'first_11': [
+                    {'id': 'p1', 'name': 'שחקן', 'name_en': 'Player One', 'shirt_number': 1,
+                     'position': 'GK', 'captain': True, 'game_time': 90},
+                    {'id': 'p2', 'name': 'Two', 'shirt_number': 9, 'position': 'FW', 'captain': False}
+                ],
+                'substitutes': [
+                    {'id': 'p3', 'name': None, 'name_en': None, 'shirt_number': 14, 'position': None, 'captain': False}
+                ]
+            },
+            'away': {
+                'first_11': [{'id': 'p4', 'name': 'Four', 'shirt_number': 4, 'position': 'DF', 'captain': False}],
+                'substitutes': []
+            }
+        },
+        'events': [
+            {'id': 'e1', 'minute': 12, 'player_id': 'p2', 'player_name': 'Two', 'team_id': 10,
+             'event_type': 'goal', 'timestamp': 720.5, 'video_timestamp': 735},
+            {'id': 'e2', 'minute': 40, 'player_id': 'p4', 'team_id': 20, 'event_type': 'yellow_card'},
+            {'id': 'e3', 'minute': 77, 'player_id': 'p9', 'player_name': 'Guest', 'team_id': 30,
+             'event_type': 'red_card'}
+        ]
+    }
+
+
+def apply_push(match, update):
+    """Apply a `$push` with `$each` like MongoDB would, to a copy of `match`."""
+    match = copy.deepcopy(match)
+    for path, spec in update['$push'].items():
+        target = match
+        *parents, leaf = path.split('.')
+        for key in parents:
+            target = target.setdefault(key, {})
+        target.setdefault(leaf, []).extend(spec['$each'])
+    return match
+
+
+def test_encode_match_round_trip():
+    match = make_match()
+    compact = encode_match(match)
+
+    assert is_compact(compact)
+    assert compact['_fmt'] == COMPACT_FORMAT
+    assert 'lineups' not in compact and 'events' not in compact
+    assert expand_match(compact) == match
+
+
+def test_encode_match_does_not_modify_input():
+    match = make_match()
+    encode_match(match)
+
+    assert match == make_match()
+
+
+def test_encode_and_expand_pass_through_their_own_shape():
+    compact = encode_match(make_match())
+
+    assert encode_match(compact) is compact
+    assert expand_match(make_match()) == make_match()
+
+
+def test_names_are_stored_once():
+    match = make_match()
+    match['events'][1]['player_name'] = 'Two'
+    compact = encode_match(match)
+
+    assert compact['names'].count('Two') == 1
+
+
+def test_compact_push_events_appends_in_order():
+    match = make_match()
+    compact = encode_match(match)
+    new_events = [
+        {'id': 'e4', 'minute': 5, 'player_id': 'p1', 'player_name': 'שחקן', 'team_id': 10, 'event_type': 'yellow_card'},
+        {'id': 'e5', 'minute': 88, 'player_id': 'p7', 'player_name': 'New Name', 'team_id': 40, 'event_type': 'goal',
+         'video_timestamp': 5300}
+    ]
+
+    query, update = compact_push_events(compact, new_events)
+    updated = apply_push(compact, update)
+
+    expected = sorted(match['events'] + new_events, key=lambda event: event['minute'])
+    assert expand_match(updated)['events'] == expected
+
+
+def test_compact_push_events_only_pushes_new_lookup_values():
+    compact = encode_match(make_match())
+    new_events = [
+        {'id': 'e4', 'minute': 5, 'player_id': 'p1', 'player_name': 'שחקן', 'team_id': 10, 'event_type': 'goal'},
+        {'id': 'e5', 'minute': 6, 'player_id': 'p7', 'player_name': 'New Name', 'team_id': 40, 'event_type': 'goal'}
+    ]
+
+    _, update = compact_push_events(compact, new_events)
+
+    assert update['$push']['names'] == {'$each': ['New Name']}
+    assert update['$push']['tm'] == {'$each': [40]}
+
+
+def test_compact_push_events_without_new_lookup_values():
+    compact = encode_match(make_match())
+    new_events = [{'id': 'e4', 'minute': 5, 'player_id': 'p2', 'player_name': 'Two', 'team_id': 10, 'event_type': 'goal'}]
+
+    _, update = compact_push_events(compact, new_events)
+
+    assert 'names' not in update['$push']
+    assert 'tm' not in update['$push']
+
+
+def test_compact_push_events_query_guards_concurrent_writes():
+    compact = encode_match(make_match())
+    new_events = [{'id': 'e4', 'minute': 5, 'player_id': 'p2', 'team_id': 10, 'event_type': 'goal'}]
+
+    query, _ = compact_push_events(compact, new_events)
+
+    assert query == {
+        '_id': '1061429',
+        'ev.id': {'$nin': ['e4']},
+        'names': {'$size': len(compact['names'])},
+        'tm': {'$size': len(compact['tm'])}
+    }
@@ -0,0 +1,123 @@
+"""Tests for the EasyCoach API response cache (utils/easycoach_client.py)."""
+import os
+
+import pytest
+import requests
+
+import easycoach_client
+from easycoach_client import EasyCoachClient, OfflineCacheMiss
+
+LEAGUE = {'status': 'ok', 'matches': [{'game_id': '1'}]}
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} error')
+
+    def json(self):
+        return self.body
+
+
+class FakeUpstream:
+    """Replays queued responses and records the headers of every request."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = FakeUpstream()
+    monkeypatch.setattr(easycoach_client.requests, 'get', upstream.get)
+    return upstream
+
+
+def make_client(tmp_path, **options):
+    return EasyCoachClient('https://api.example', 'token', cache_dir=str(tmp_path), **options)
+
+
+def cached_files(tmp_path):
+    return [name for _, _, names in os.walk(tmp_path) for name in names]
+
+
+def test_not_modified_reuses_the_cached_body(tmp_path, upstream):
+    upstream.responses += [
+        FakeResponse(body=LEAGUE, headers={'ETag': '"v1"', 'Last-Modified': 'Sat, 17 Aug 2024 08:30:00 GMT'}),
+        FakeResponse(304)
+    ]
+    client = make_client(tmp_path)
+
+    assert client.get('/league', {'league_id': 726}) == LEAGUE
+    assert client.get('/league', {'league_id': 726}) == LEAGUE
+
+    assert upstream.requests[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Sat, 17 Aug 2024 08:30:00 GMT'}
+    assert len(cached_files(tmp_path)) == 1
+
+
+def test_fresh_entries_are_reused_without_a_request(tmp_path, upstream):
+    upstream.responses.append(FakeResponse(body=LEAGUE))
+    client = make_client(tmp_path, max_age=60)
+
+    client.get('/league', {'league_id': 726})
+    assert client.get('/league', {'league_id': 726}) == LEAGUE
+
+    assert len(upstream.requests) == 1
+
+
+def test_stale_entries_are_fetched_again(tmp_path, upstream):
+    updated = {'status': 'ok', 'matches': []}
+    upstream.responses += [FakeResponse(body=LEAGUE), FakeResponse(body=updated)]
+    client = make_client(tmp_path, max_age=0)
+
+    client.get('/league', {'league_id': 726})
+
+    assert client.get('/league', {'league_id': 726}) == updated
+    assert upstream.requests[1] == {}
+
+
+def test_offline_replays_recordings_and_never_fetches(tmp_path, upstream):
+    upstream.responses.append(FakeResponse(body=LEAGUE))
+    make_client(tmp_path).get('/league', {'league_id': 726})
+    offline = make_client(tmp_path, offline=True)
+
+    # The user token is not part of the cache key
+    offline.user_token = 'another token'
+    assert offline.get('/league', {'league_id': 726}) == LEAGUE
+    with pytest.raises(OfflineCacheMiss):
+        offline.get('/league', {'league_id': 727})
+
+    assert len(upstream.requests) == 1
+
+
+@pytest.mark.parametrize('response', [
+    FakeResponse(body={'status': 'error', 'message': 'unknown league'}),
+    FakeResponse(202, body={'status': 'pending'})
+])
+def test_errors_in_the_body_are_not_recorded(tmp_path, upstream, response):
+    upstream.responses.append(response)
+
+    assert make_client(tmp_path).get('/league', {'league_id': 726}) == response.body
+
+    assert cached_files(tmp_path) == []
+
+
+def test_http_errors_raise_and_keep_the_previous_recording(tmp_path, upstream):
+    upstream.responses += [FakeResponse(body=LEAGUE), FakeResponse(500)]
+    client = make_client(tmp_path)
+    client.get('/league', {'league_id': 726})
+
+    with pytest.raises(requests.HTTPError):
+        client.get('/league', {'league_id': 726})
+
+    assert make_client(tmp_path, offline=True).get('/league', {'league_id': 726}) == LEAGUE
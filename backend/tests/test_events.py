@@ -0,0 +1,228 @@
+"""Tests for event validation and de-duplication (flaskr/services/event_service.py)."""
+import copy
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from flaskr.services.event_service import MAX_EVENTS_PER_BATCH, EventService, EventValidationError, validate_events
+from storage.compact import encode_match
+
+
+def make_event(**fields):
+    event = {'id': 'e1', 'minute': 10, 'player_id': 'p1', 'team_id': 10, 'event_type': 'goal'}
+    event.update(fields)
+    return event
+
+
+class FakeCollection:
+    """Records writes; reads return copies of the seeded documents."""
+
+    def __init__(self, documents=()):
+        self.documents = {document['_id']: document for document in documents}
+        self.updates = []
+        self.update_sessions = []
+        self.bulk_writes = []
+
+    def find_one(self, query, projection=None, session=None):
+        return copy.deepcopy(self.documents.get(query['_id']))
+
+    def update_one(self, query, update, upsert=False, session=None):
+        self.updates.append((query, update))
+        self.update_sessions.append(session)
+        return SimpleNamespace(matched_count=1 if query['_id'] in self.documents else 0)
+
+    def bulk_write(self, requests, ordered=True, session=None):
+        self.bulk_writes.append(requests)
+        return SimpleNamespace(modified_count=len(requests))
+
+
+class StandaloneClient:
+    """A server without transactions, so EventService writes without a session."""
+
+    def start_session(self):
+        raise OperationFailure('Transaction numbers are only allowed on a replica set member or mongos', code=20)
+
+
+class ReplicaSetClient:
+    """A server with transactions: the operation runs once, in a session."""
+
+    class Session:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def with_transaction(self, operation):
+            return operation(self)
+
+    def start_session(self):
+        return self.Session()
+
+
+class FakeDatabase:
+    def __init__(self, matches=(), client=None):
+        self.client = client or StandaloneClient()
+        self.matches = FakeCollection(matches)
+        self.players = FakeCollection()
+        self.meta = FakeCollection()
+
+
+def stored_match(encoded=False, home_score=None, away_score=None):
+    match = {
+        '_id': 'm1',
+        'match_info': {'home_team': {'id': 10}, 'away_team': {'id': 20}, 'home_score': home_score, 'away_score': away_score},
+        'lineups': {},
+        'events': [make_event(id='old')]
+    }
+    return encode_match(match) if encoded else match
+
+
+# validate_events
+
+def test_valid_events_are_cleaned():
+    events, errors = validate_events([make_event(id=7, extra='dropped', timestamp=12.5)])
+
+    assert errors == []
+    assert events == [{'id': '7', 'minute': 10, 'player_id': 'p1', 'team_id': 10, 'event_type': 'goal', 'timestamp': 12.5}]
+
+
+@pytest.mark.parametrize('payload, message', [
+    ({'id': 'e1'}, 'Expected a list of events'),
+    ([make_event()] * (MAX_EVENTS_PER_BATCH + 1), f'At most {MAX_EVENTS_PER_BATCH} events per request')
+])
+def test_invalid_batches_are_rejected(payload, message):
+    assert validate_events(payload) == ([], [message])
+
+
+@pytest.mark.parametrize('event', [
+    'not an object',
+    make_event(player_id=None),
+    make_event(event_type='corner'),
+    make_event(event_type=[]),
+    make_event(event_type={'goal': 1}),
+    make_event(team_id=[10]),
+    make_event(id=True),
+    make_event(minute=-1),
+    make_event(minute=True),
+    make_event(minute=10.5),
+    make_event(timestamp='12'),
+    make_event(video_timestamp=False),
+    make_event(player_name=7)
+])
+def test_invalid_events_are_rejected(event):
+    events, errors = validate_events([make_event(id='ok'), event])
+
+    assert [e['id'] for e in events] == ['ok']
+    assert len(errors) == 1 and errors[0].startswith('events[1]: ')
+
+
+# add_events
+
+@pytest.mark.parametrize('encoded', [False, True])
+def test_add_events_skips_stored_and_repeated_ids(encoded):
+    db = FakeDatabase([stored_match(encoded)])
+    events = [make_event(id='old'), make_event(id='new'), make_event(id='new', minute=50)]
+
+    result = EventService(db).add_events('m1', events)
+
+    assert result == {'match_id': 'm1', 'received': 3, 'inserted': 1, 'duplicates': 2, 'players_updated': 1}
+    (query, update), = db.matches.updates
+    pushed_ids = update['$push']['ev.id' if encoded else 'events']['$each']
+    if not encoded:
+        pushed_ids = [event['id'] for event in pushed_ids]
+    assert pushed_ids == ['new']
+    assert query['ev.id' if encoded else 'events.id'] == {'$nin': ['new']}
+
+
+def test_add_events_counts_each_player_once():
+    db = FakeDatabase([stored_match()])
+    events = [make_event(id='a'), make_event(id='b'), make_event(id='c', player_id='p2', event_type='yellow_card')]
+
+    EventService(db).add_events('m1', events)
+
+    (requests,) = db.players.bulk_writes
+    increments = {request._filter['_id']: request._doc['$inc'] for request in requests}
+    assert increments == {
+        'p1': {'total_stats.goals': 2, 'matches_played.$.goals': 2},
+        'p2': {'total_stats.yellow_cards': 1, 'matches_played.$.yellow_cards': 1}
+    }
+
+
+def test_add_events_records_touched_cache_keys():
+    db = FakeDatabase([stored_match()])
+
+    events = [make_event(id='a', event_type='red_card'), make_event(id='b', player_id='p2', event_type='yellow_card')]
+
+    EventService(db).add_events('m1', events)
+
+    (_, update), = db.meta.updates
+    assert update['$push']['changes']['$each'] == [[['match', 'm1'], ['player', 'p1'], ['player', 'p2']]]
+
+
+def test_goals_also_record_listing_and_team_key_prefixes():
+    db = FakeDatabase([stored_match()])
+
+    EventService(db).add_events('m1', [make_event(id='a')])
+
+    (_, update), = db.meta.updates
+    assert update['$push']['changes']['$each'] == [[
+        ['match', 'm1'], ['player', 'p1'], ['matches'], ['team_form', '10'], ['team_form', '20'], ['head_to_head']
+    ]]
+
+
+def test_add_events_records_touched_cache_keys_after_the_transaction():
+    db = FakeDatabase([stored_match()], client=ReplicaSetClient())
+
+    EventService(db).add_events('m1', [make_event(id='a')])
+
+    assert db.matches.update_sessions[0] is not None
+    assert db.meta.update_sessions == [None]
+
+
+def test_add_events_with_only_duplicates_writes_nothing():
+    db = FakeDatabase([stored_match()])
+
+    result = EventService(db).add_events('m1', [make_event(id='old')])
+
+    assert result['inserted'] == 0 and result['duplicates'] == 1
+    assert db.matches.updates == [] and db.players.bulk_writes == [] and db.meta.updates == []
+
+
+@pytest.mark.parametrize('encoded', [False, True])
+def test_add_events_adds_goals_to_the_score(encoded):
+    db = FakeDatabase([stored_match(encoded, home_score=1, away_score=0)])
+    events = [make_event(id='a'), make_event(id='b', team_id='10'), make_event(id='c', team_id=20, minute=80),
+              make_event(id='d', team_id=20, event_type='yellow_card')]
+
+    EventService(db).add_events('m1', events)
+
+    (query, update), = db.matches.updates
+    assert update['$inc'] == {'match_info.home_score': 2, 'match_info.away_score': 1}
+    assert 'match_info.home_score' not in query
+
+
+def test_add_events_sets_an_unset_score():
+    db = FakeDatabase([stored_match(away_score=2)])
+
+    EventService(db).add_events('m1', [make_event(id='a'), make_event(id='b', team_id=20)])
+
+    (query, update), = db.matches.updates
+    assert update['$set'] == {'match_info.home_score': 1}
+    assert update['$inc'] == {'match_info.away_score': 1}
+    assert query['match_info.home_score'] is None
+
+
+def test_add_events_rejects_teams_not_in_the_match():
+    db = FakeDatabase([stored_match()])
+
+    with pytest.raises(EventValidationError) as raised:
+        EventService(db).add_events('m1', [make_event(id='a'), make_event(id='b', team_id=30)])
+
+    assert raised.value.errors == ["events[1]: team_id 30 does not play in match m1"]
+    assert db.matches.updates == [] and db.players.bulk_writes == []
+
+
+def test_add_events_unknown_match():
+    assert EventService(FakeDatabase()).add_events('missing', [make_event()]) is None
@@ -0,0 +1,112 @@
+"""Tests for the NDJSON exports (flaskr/services/export_service.py)."""
+import json
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from flaskr.services.export_service import ExportService
+from storage.compact import encode_match
+
+
+class FailingCursor:
+    """A find() cursor whose query fails when the first batch is fetched."""
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        raise OperationFailure('operation exceeded time limit', code=50)
+
+
+class FailingDatabase:
+    class matches:
+        @staticmethod
+        def find(*args, **kwargs):
+            return FailingCursor()
+
+    players = None
+
+
+def test_query_errors_surface_before_streaming():
+    with pytest.raises(OperationFailure):
+        ExportService(FailingDatabase()).iter_ndjson('matches')
+
+
+def match(match_id, match_date, league_id, events=(), encoded=False):
+    document = {
+        '_id': match_id,
+        'league_id': league_id,
+        'season_id': 26,
+        'match_info': {
+            'id': match_id,
+            'home_team': {'id': '10', 'name': 'Home'},
+            'away_team': {'id': '20', 'name': 'Away'},
+            'home_score': 1,
+            'away_score': 0,
+            'match_date': match_date,
+            'competition_name': 'League'
+        },
+        'lineups': {},
+        'events': list(events)
+    }
+    return encode_match(document) if encoded else document
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip('mongomock')
+    db = mongomock.MongoClient().football_app
+    goal = {'id': 'g1', 'minute': 12, 'player_id': 'p1', 'team_id': '10', 'event_type': 'goal'}
+    card = {'id': 'y1', 'minute': 40, 'player_id': 'p2', 'team_id': '20', 'event_type': 'yellow_card'}
+    db.matches.insert_many([
+        match('m1', '2024-08-01', 726, [goal]),
+        match('m2', '2024-08-08', 726, [card], encoded=True),
+        match('m3', '2024-09-01', 727)
+    ])
+    db.players.insert_many([
+        {'_id': 'p1', 'name': 'One', 'position': 'FW', 'matches_played': [
+            {'match_id': 'm2', 'match_date': '2024-08-08', 'league_id': 726, 'goals': 0},
+            {'match_id': 'm1', 'match_date': '2024-08-01', 'league_id': 726, 'goals': 1}
+        ]},
+        {'_id': 'p2', 'name': 'Two', 'position': 'DF', 'matches_played': [
+            {'match_id': 'm3', 'match_date': '2024-09-01', 'league_id': 727, 'goals': 0}
+        ]}
+    ])
+    return db
+
+
+def export(db, dataset, chunk_size=64 * 1024, **filters):
+    text = ''.join(ExportService(db, batch_size=2).iter_ndjson(dataset, chunk_size=chunk_size, **filters))
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_matches_filtered_by_date_and_league(db):
+    rows = export(db, 'matches', date_from='2024-08-05', league_id=726)
+
+    assert [row['id'] for row in rows] == ['m2']
+    assert rows[0]['league_id'] == 726 and rows[0]['competition_name'] == 'League'
+
+
+def test_events_of_both_encodings_one_row_each(db):
+    rows = export(db, 'events')
+
+    assert [(row['match_id'], row['id'], row['match_date']) for row in rows] == [
+        ('m1', 'g1', '2024-08-01'), ('m2', 'y1', '2024-08-08')
+    ]
+
+
+def test_appearances_keep_only_matching_entries(db):
+    rows = export(db, 'appearances', date_to='2024-08-05')
+
+    assert [(row['player_id'], row['match_id']) for row in rows] == [('p1', 'm1')]
+    assert rows[0]['player_name'] == 'One' and rows[0]['goals'] == 1
+
+
+def test_rows_are_grouped_into_chunks(db):
+    chunks = list(ExportService(db).iter_ndjson('matches', chunk_size=1))
+
+    assert len(chunks) == 3 and all(chunk.count('\n') == 1 for chunk in chunks)
+
+
+def test_empty_export(db):
+    assert export(db, 'matches', league_id=1) == []
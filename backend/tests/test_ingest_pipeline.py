@@ -0,0 +1,236 @@
+"""Tests for the threaded ingest pipeline (utils/ingest_pipeline.py)."""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import ingest_pipeline
+from easycoach_client import OfflineCacheMiss
+from flaskr.services.event_service import EventService
+from ingest_pipeline import AppearanceStage, FetchStage, MatchWriteStage, NormalizeStage, Pipeline, Stage
+from storage.compact import encode_match, expand_match
+
+
+class Relay(Stage):
+    """Passes items on, failing on one of them."""
+
+    def __init__(self, name, fail_on=None, workers=1):
+        self.name = name
+        self.workers = workers
+        self.fail_on = fail_on
+        self.seen = []
+        self.finished = 0
+        self.lock = threading.Lock()
+
+    def process(self, item, emit):
+        if item == self.fail_on:
+            raise ValueError(f'bad item {item}')
+        with self.lock:
+            self.seen.append(item)
+        emit(item)
+
+    def finish(self, emit):
+        self.finished += 1
+
+
+def run_with_timeout(pipeline, items, timeout=10):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(ok=pipeline.run(items)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'pipeline did not drain'
+    return result['ok']
+
+
+def test_pipeline_passes_every_item_and_finishes_each_stage_once():
+    first, second, last = Relay('first', workers=3), Relay('second', workers=2), Relay('last')
+
+    assert run_with_timeout(Pipeline([first, second, last], queue_size=2), range(100)) is True
+
+    assert sorted(last.seen) == list(range(100))
+    assert (first.finished, second.finished, last.finished) == (1, 1, 1)
+
+
+def test_pipeline_drains_after_a_failure_without_finishing():
+    # Tiny queues: upstream would block forever if the failed stage stopped reading
+    first, failing, last = Relay('first'), Relay('failing', fail_on=5), Relay('last')
+    pipeline = Pipeline([first, failing, last], queue_size=1)
+
+    assert run_with_timeout(pipeline, range(200)) is False
+
+    assert [name for name, _ in pipeline.errors] == ['failing']
+    assert 5 not in last.seen
+    assert (failing.finished, last.finished) == (0, 0)
+
+
+class FakeMatches:
+    """Stored matches, with the query operators the ingest stages use."""
+
+    def __init__(self, documents=()):
+        self.documents = {document['_id']: document for document in documents}
+        self.bulk_writes = []
+        self.deletes = []
+
+    @staticmethod
+    def matches(document, query):
+        for field, condition in query.items():
+            if isinstance(condition, dict):
+                if document.get(field) in condition['$nin']:
+                    return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        return [document for document in self.documents.values() if self.matches(document, query)]
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(requests)
+        return SimpleNamespace(matched_count=0, upserted_count=len(requests))
+
+    def delete_many(self, query):
+        self.deletes.append(query)
+        return SimpleNamespace(deleted_count=0)
+
+
+@pytest.fixture
+def matches(monkeypatch):
+    matches = FakeMatches([
+        {'_id': 'a', 'league_id': 1, 'season_id': 1},
+        {'_id': 'b', 'league_id': 1, 'season_id': 1},
+        {'_id': 'c', 'league_id': 2, 'season_id': 1}
+    ])
+    monkeypatch.setattr(ingest_pipeline, 'db', SimpleNamespace(matches=matches))
+    monkeypatch.setattr(ingest_pipeline, 'find_breakdown_files', lambda *args: {})
+    return matches
+
+
+def collect(stage, item):
+    emitted = []
+    stage.process(item, emitted.append)
+    return emitted
+
+
+def test_failed_league_passes_on_its_stored_matches(matches, monkeypatch):
+    monkeypatch.setattr(ingest_pipeline, 'fetch_matches_from_api', lambda league_id, season_id: [])
+    fetch = FetchStage(workers=1, league_seasons=[(1, 1)])
+
+    emitted = collect(fetch, (1, 1))
+
+    assert [item['doc']['_id'] for item in emitted[:-1]] == ['a', 'b']
+    assert emitted[-1] == {'kind': 'league_done', 'league_id': 1, 'season_id': 1, 'ok': False}
+    assert (1, 1) in fetch.errors
+
+
+def test_offline_miss_keeps_the_matches_not_fetched_yet(matches, monkeypatch):
+    monkeypatch.setattr(ingest_pipeline, 'fetch_matches_from_api',
+                        lambda league_id, season_id: [{'game_id': 'a'}, {'game_id': 'b'}])
+
+    def fetch_match_details(match_id):
+        if match_id == 'b':
+            raise OfflineCacheMiss('no recording for b')
+        return {'status': 'ok'}
+    monkeypatch.setattr(ingest_pipeline, 'fetch_match_details', fetch_match_details)
+
+    emitted = collect(FetchStage(workers=1, league_seasons=[(1, 1)]), (1, 1))
+
+    assert [item['kind'] for item in emitted] == ['api', 'stored', 'league_done']
+    assert emitted[0]['match']['game_id'] == 'a'
+    assert emitted[1]['doc']['_id'] == 'b'
+    assert emitted[-1]['ok'] is False
+
+
+def test_match_write_prunes_only_leagues_that_succeeded(matches):
+    write_match = MatchWriteStage(batch_size=10)
+    doc = {'_id': 'a', 'league_id': 1, 'season_id': 1}
+
+    collect(write_match, {'kind': 'match', 'doc': doc, 'store': True, 'keep_events': False})
+    collect(write_match, {'kind': 'league_done', 'league_id': 1, 'season_id': 1, 'ok': False})
+    collect(write_match, {'kind': 'league_done', 'league_id': 2, 'season_id': 1, 'ok': True})
+
+    assert matches.deletes == [{'league_id': 2, 'season_id': 1, '_id': {'$nin': []}}]
+    assert (1, 1) not in write_match.results
+
+
+def apply_bulk_write(collection):
+    """mongomock's bulk_write does not run on current pymongo: apply the requests one by one."""
+    def bulk_write(requests, ordered=True, session=None):
+        results = [
+            collection.replace_one(request._filter, request._doc, upsert=request._upsert)
+            if hasattr(request, '_doc') and not any(key.startswith('$') for key in request._doc)
+            else collection.update_one(request._filter, request._doc, upsert=request._upsert)
+            for request in requests
+        ]
+        return SimpleNamespace(
+            matched_count=sum(result.matched_count for result in results),
+            modified_count=sum(result.modified_count for result in results),
+            upserted_count=sum(result.upserted_id is not None for result in results)
+        )
+    collection.bulk_write = bulk_write
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    mongomock = pytest.importorskip('mongomock')
+    database = mongomock.MongoClient().football_app
+    apply_bulk_write(database.matches)
+    apply_bulk_write(database.players)
+    monkeypatch.setattr(ingest_pipeline, 'db', database)
+    # mongomock has no sessions: write like a standalone server
+    monkeypatch.setattr(EventService, '_run_in_transaction', lambda self, operation: operation(None))
+    return database
+
+
+def api_item():
+    return {
+        'kind': 'api',
+        'league_id': 1,
+        'season_id': 1,
+        'match': {'game_id': 'm1', 'date': '17/08/24', 'hour': '18:00', 'result': '1-0',
+                  'team_a_id': '10', 'team_a_name': 'Home', 'team_b_id': '20', 'team_b_name': 'Away'},
+        'details': {'teams': [{'players': [{'player_id': 'p1', 'player_name': 'Scorer', 'main': '1'}]}, {'players': []}]}
+    }
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_ingest_keeps_posted_events(mongo, monkeypatch, compact):
+    monkeypatch.setattr(ingest_pipeline, 'prepare_for_storage', encode_match if compact else (lambda doc: doc))
+
+    def ingest():
+        appearances = AppearanceStage()
+        pipeline = Pipeline([NormalizeStage(), MatchWriteStage(), appearances])
+        assert pipeline.run([api_item()])
+        return appearances.players
+
+    ingest()
+    posted = {'id': 'live1', 'minute': 12, 'player_id': 'p1', 'team_id': '10', 'event_type': 'goal'}
+    assert EventService(mongo).add_events('m1', [posted])['inserted'] == 1
+
+    players = ingest()
+
+    assert expand_match(mongo.matches.find_one({'_id': 'm1'}))['events'] == [posted]
+    assert players['p1']['total_stats']['goals'] == 1
+
+
+def test_ingest_rewrites_a_match_that_got_an_event_meanwhile(mongo):
+    early = {'id': 'live1', 'minute': 5, 'player_id': 'p1', 'team_id': '10', 'event_type': 'goal'}
+    late = {'id': 'live2', 'minute': 30, 'player_id': 'p1', 'team_id': '10', 'event_type': 'goal'}
+    mongo.matches.insert_one({'_id': 'm1', 'league_id': 1, 'season_id': 1, 'events': [early]})
+
+    # An event posted between reading the stored events and replacing the match
+    bulk_write = mongo.matches.bulk_write
+
+    def post_then_write(requests, **kwargs):
+        if mongo.matches.bulk_write is post_then_write:
+            mongo.matches.bulk_write = bulk_write
+            mongo.matches.update_one({'_id': 'm1'}, {'$push': {'events': late}})
+        return bulk_write(requests, **kwargs)
+    mongo.matches.bulk_write = post_then_write
+
+    write_match = MatchWriteStage()
+    emitted = collect(write_match, {'kind': 'match', 'doc': {'_id': 'm1', 'league_id': 1, 'season_id': 1, 'events': []},
+                                    'store': True, 'keep_events': True})
+    write_match.finish(emitted.append)
+
+    assert mongo.matches.find_one({'_id': 'm1'})['events'] == [early, late]
+    assert emitted[0]['events'] == [early, late]
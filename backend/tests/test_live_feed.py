@@ -0,0 +1,122 @@
+"""Tests for resuming a live match feed (flaskr/live_feed.py)."""
+import threading
+
+from flask import has_request_context
+
+import flaskr.db
+from flaskr import create_app
+from flaskr.live_feed import MatchChannel, Subscription
+from flaskr.services import MatchService
+
+
+def make_channel(published=0, history=5):
+    channel = MatchChannel('1061429', 'stream', history=history)
+    for minute in range(1, published + 1):
+        channel.publish('event', {'minute': minute})
+    return channel
+
+
+def minutes(messages):
+    return [data['minute'] for _, _, data in messages]
+
+
+def test_replay_after_returns_missed_messages():
+    channel = make_channel(published=4)
+
+    assert minutes(channel.replay_after('stream-2')) == [3, 4]
+
+
+def test_replay_after_latest_id_is_empty():
+    channel = make_channel(published=4)
+
+    assert channel.replay_after('stream-4') == []
+
+
+def test_replay_after_zero_replays_everything_kept():
+    channel = make_channel(published=3)
+
+    assert minutes(channel.replay_after('stream-0')) == [1, 2, 3]
+
+
+def test_replay_after_oldest_kept_boundary():
+    # History keeps messages 4..8; resuming from 3 misses nothing
+    channel = make_channel(published=8, history=5)
+
+    assert minutes(channel.replay_after('stream-3')) == [4, 5, 6, 7, 8]
+    assert channel.replay_after('stream-2') is None
+
+
+def test_replay_after_needs_a_snapshot_for_unknown_ids():
+    channel = make_channel(published=4)
+
+    for last_event_id in (None, '', 'other-2', 'stream-9', 'stream-x', 'stream-', 'stream--1'):
+        assert channel.replay_after(last_event_id) is None
+
+
+def test_replay_after_accepts_stream_ids_with_dashes():
+    channel = MatchChannel('1061429', 'a-b-c', history=5)
+    channel.publish('event', {'minute': 1})
+    channel.publish('event', {'minute': 2})
+
+    assert minutes(channel.replay_after('a-b-c-1')) == [2]
+
+
+def test_message_ids_follow_the_snapshot_position():
+    channel = make_channel(published=2)
+    snapshot_id, event_type, _ = channel.snapshot()
+
+    channel.publish('event', {'minute': 3})
+
+    assert event_type == 'snapshot'
+    assert snapshot_id == 'stream-2'
+    assert minutes(channel.replay_after(snapshot_id)) == [3]
+
+
+class FakeClient:
+    """Stands in for MongoClient, recording whether it was closed."""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+        self.thread = threading.current_thread()
+        FakeClient.instances.append(self)
+
+    def __getitem__(self, name):
+        return self
+
+    def __getattr__(self, name):
+        return None
+
+    @property
+    def client(self):
+        return self
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_releases_the_request_client_before_streaming(monkeypatch):
+    monkeypatch.setattr(flaskr.db, 'MongoClient', FakeClient)
+    monkeypatch.setattr(FakeClient, 'instances', [])
+    state = {'score': {'home': 1, 'away': 0}, 'events': []}
+    monkeypatch.setattr(MatchService, 'get_live_state', lambda self, match_id: state)
+    waits_in_request_context = []
+    get = Subscription.get
+    monkeypatch.setattr(Subscription, 'get', lambda self, timeout: (
+        waits_in_request_context.append(has_request_context()) or get(self, timeout)
+    ))
+    app = create_app({'TESTING': True, 'WARMUP_ENABLED': False, 'LIVE_FEED_POLL_INTERVAL': 0.01,
+                      'LIVE_FEED_HEARTBEAT': 0.01})
+
+    response = app.test_client().get('/matches/m1/stream', buffered=False)
+    # The test client runs the request on this thread; the producer has its own
+    request_client, = [client for client in FakeClient.instances if client.thread is threading.current_thread()]
+    chunks = iter(response.response)
+
+    # The request (and its context) is over, yet the stream keeps going
+    assert request_client.closed
+    assert next(chunks) == b'retry: 3000\n\n'
+    assert b'event: snapshot' in next(chunks)
+    assert next(chunks) == b': keep-alive\n\n'
+    assert waits_in_request_context == [False]
+    response.close()
@@ -0,0 +1,105 @@
+"""Tests for the skill similarity search (flaskr/services/similarity_service.py)."""
+import pytest
+
+import flaskr.services.similarity_service as similarity_service
+from flaskr import create_app
+from flaskr.services.similarity_service import MAX_K, SimilarityService, SkillIndex
+from storage.skills import SKILL_CATEGORIES
+
+
+def player(player_id, skills, position='CM', team_id=1):
+    return {
+        '_id': player_id,
+        'name': f'Player {player_id}',
+        'position': position,
+        'team_id': team_id,
+        'skills': dict(zip(SKILL_CATEGORIES, skills))
+    }
+
+
+PLAYERS = [
+    player('target', [5, 5, 5, 5, 5, 5]),
+    # Same profile at twice the level: nearest by angle, far by distance
+    player('scaled', [10, 10, 10, 10, 10, 10]),
+    player('close', [5, 5, 5, 5, 5, 7]),
+    player('opposite', [9, 1, 9, 1, 9, 1], position='CB', team_id=2),
+    player('keeper', [4, 5, 4, 6, 5, 9], position='GK', team_id=2)
+]
+
+
+def ids(results):
+    return [result['id'] for result in results]
+
+
+def test_cosine_ranks_by_profile_shape():
+    results = SkillIndex(PLAYERS).search('target', k=2, metric='cosine')
+
+    assert ids(results) == ['scaled', 'close']
+    assert results[0]['distance'] == 0
+
+
+def test_euclidean_ranks_by_distance():
+    assert ids(SkillIndex(PLAYERS).search('target', k=2, metric='euclidean')) == ['close', 'keeper']
+
+
+def test_filters_and_never_returns_the_player_itself():
+    index = SkillIndex(PLAYERS)
+
+    assert ids(index.search('target', k=10, team_id='2')) == ['keeper', 'opposite']
+    assert ids(index.search('target', k=10, position='CB')) == ['opposite']
+    assert index.search('target', k=10, position='ST') == []
+    assert 'target' not in ids(index.search('target', k=10))
+
+
+def test_unknown_player_and_metric():
+    index = SkillIndex(PLAYERS)
+
+    assert index.search('missing') is None
+    with pytest.raises(ValueError):
+        index.search('target', metric='manhattan')
+
+
+@pytest.mark.parametrize('k, expected', [(0, 1), (-5, 1), (3, 3), (10 * MAX_K, MAX_K)])
+def test_k_is_clamped(monkeypatch, k, expected):
+    players = [player(str(i), [i % 10, 5, 5, 5, 5, 5]) for i in range(MAX_K + 20)]
+    monkeypatch.setattr(SimilarityService, 'get_index', lambda self: SkillIndex(players))
+
+    assert len(SimilarityService(FakeDatabase([])).get_similar_players('0', k=k)) == expected
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.finds = 0
+
+    def find(self, query=None, projection=None):
+        self.finds += 1
+        return list(self.documents)
+
+    def find_one(self, query, projection=None):
+        self.finds += 1
+        return next((document for document in self.documents if document['_id'] == query['_id']), None)
+
+
+class FakeDatabase:
+    def __init__(self, players):
+        self.players = FakeCollection(players)
+        self.meta = FakeCollection([{'_id': 'ingest', 'version': 'v1'}])
+
+
+def test_index_follows_the_read_cache_ingest_stamp(monkeypatch):
+    monkeypatch.setattr(similarity_service, '_index', None)
+    db = FakeDatabase(PLAYERS)
+    app = create_app({'TESTING': True, 'WARMUP_ENABLED': False, 'READ_CACHE_VERSION_TTL': 60})
+
+    with app.app_context():
+        service = SimilarityService(db)
+        first = service.get_index()
+        assert service.get_index() is first
+        # Stamps were read once for both requests, within the TTL
+        assert (db.players.finds, db.meta.finds) == (1, 2)
+
+        db.meta.documents[0]['version'] = 'v2'
+        app.extensions['read_cache'].refresh(db)
+        assert service.get_index() is not first
+        assert db.players.finds == 2
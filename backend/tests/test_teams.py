@@ -0,0 +1,69 @@
+"""Tests for team form and head-to-head (flaskr/services/team_service.py)."""
+import pytest
+
+from flaskr.services.team_service import TeamService
+
+
+def match(match_id, kickoff_time, home, away, home_score, away_score):
+    return {
+        '_id': match_id,
+        'match_info': {
+            'id': match_id,
+            'home_team': {'id': home, 'name': f'Team {home}'},
+            'away_team': {'id': away, 'name': f'Team {away}'},
+            'home_score': home_score,
+            'away_score': away_score,
+            'kickoff_time': kickoff_time,
+            'match_date': kickoff_time[:10]
+        }
+    }
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip('mongomock')
+    db = mongomock.MongoClient().football_app
+    db.matches.insert_many([
+        match('m1', '2024-08-01T18:00:00', '10', '20', 2, 0),
+        # Breakdown matches store team ids as ints
+        match('m2', '2024-08-08T18:00:00', 30, 10, 1, 1),
+        match('m3', '2024-08-15T18:00:00', '20', '10', 3, 1),
+        match('m4', '2024-08-22T18:00:00', '10', '20', None, None),
+        match('m5', '2024-08-29T18:00:00', '30', '40', 0, 0)
+    ])
+    return db
+
+
+def test_team_form_newest_first_over_both_id_types(db):
+    form = TeamService(db).get_team_form('10', n=5)
+
+    assert [m['id'] for m in form['matches']] == ['m3', 'm2', 'm1']
+    assert [m['result'] for m in form['matches']] == ['L', 'D', 'W']
+    assert form['summary'] == {'played': 3, 'wins': 1, 'draws': 1, 'losses': 1, 'goals_for': 4,
+                               'goals_against': 4, 'form': 'WDL'}
+    assert form['team_name'] == 'Team 10'
+
+
+def test_team_form_keeps_the_last_n_played(db):
+    form = TeamService(db).get_team_form('10', n=2)
+
+    assert [m['id'] for m in form['matches']] == ['m3', 'm2']
+    assert form['summary']['form'] == 'DL'
+
+
+def test_team_form_unknown_team(db):
+    assert TeamService(db).get_team_form('99') is None
+
+
+def test_head_to_head_counts_played_meetings_from_team_a(db):
+    head_to_head = TeamService(db).get_head_to_head('20', '10')
+
+    assert [m['id'] for m in head_to_head['matches']] == ['m4', 'm3', 'm1']
+    assert [m['result'] for m in head_to_head['matches']] == [None, 'W', 'L']
+    assert head_to_head['summary'] == {'played': 2, 'team_a_wins': 1, 'team_b_wins': 1, 'draws': 0,
+                                       'team_a_goals': 3, 'team_b_goals': 3}
+    assert head_to_head['team_a'] == {'id': '20', 'name': 'Team 20'}
+
+
+def test_head_to_head_teams_that_never_met(db):
+    assert TeamService(db).get_head_to_head('10', '40') is None
@@ -0,0 +1,59 @@
+"""Tests for starting the read cache warm-up (flaskr/warmup.py)."""
+import threading
+
+import pytest
+
+import flaskr.warmup
+from flaskr import create_app
+
+
+@pytest.fixture
+def release(monkeypatch):
+    """Replace warm_cache with one that finishes when the returned event is set."""
+    release = threading.Event()
+
+    def warm_cache(app, state):
+        release.wait(5)
+        state.done.set()
+
+    monkeypatch.setattr(flaskr.warmup, 'warm_cache', warm_cache)
+    return release
+
+
+def make_app(tmp_path, **config):
+    return create_app({'TESTING': True, 'WARMUP_ACCESS_LOG': str(tmp_path / 'access_log.json'), **config})
+
+
+def test_create_app_does_not_start_the_warm_up(tmp_path, release):
+    app = make_app(tmp_path)
+
+    assert app.extensions['warmup'].started_at is None
+
+
+def test_first_request_starts_the_warm_up(tmp_path, release):
+    client = make_app(tmp_path).test_client()
+
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.json['warmed'] is False
+
+    release.set()
+    client.application.extensions['warmup'].done.wait(5)
+    assert client.get('/health/ready').status_code == 200
+
+
+def test_ready_after_the_timeout_while_still_warming(tmp_path, release):
+    client = make_app(tmp_path, WARMUP_TIMEOUT=0).test_client()
+
+    response = client.get('/health/ready')
+
+    assert response.status_code == 200
+    assert response.json['timed_out'] is True and response.json['warmed'] is False
+    release.set()
+
+
+def test_disabled_warm_up_is_ready_at_once(tmp_path, release):
+    client = make_app(tmp_path, WARMUP_ENABLED=False).test_client()
+
+    assert client.get('/health/ready').status_code == 200
+    assert client.application.extensions['warmup'].started_at is None
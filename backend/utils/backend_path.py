@@ -0,0 +1,11 @@
+"""Put backend/ on sys.path so the ingest scripts can import the shared `storage` package.
+
+Import this before any `storage` import.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,138 @@
+"""Compare throughput per worker of the WSGI (Flask) and ASGI apps.
+
+Start one worker of each against the same database, with the read cache
+off so both measure database I/O rather than cache hits:
+
+    READ_CACHE_MAX_ENTRIES=0 WARMUP_ENABLED=0 gunicorn -w 1 --threads 8 -b 127.0.0.1:5000 "flaskr:create_app()"
+    uvicorn --factory flaskr.asgi:create_asgi_app --workers 1 --port 8000
+
+Then run:
+
+    python utils/benchmark_asgi.py --concurrency 200 --requests 5000
+
+Every path is first fetched from both servers and the bodies compared, so
+the benchmark also checks that the two apps return the same responses.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+# Ids sampled from the listing for the match and player lookups
+SAMPLE_SIZE = 20
+
+
+async def discover_paths(client, base_url):
+    """The listing plus a sample of match and player detail paths."""
+    response = await client.get(f'{base_url}/matches')
+    response.raise_for_status()
+    matches = [match for day in response.json()['matches_by_day'].values() for match in day]
+    match_ids = [match['id'] for match in matches[:SAMPLE_SIZE]]
+
+    player_ids = []
+    for match_id in match_ids:
+        details = (await client.get(f'{base_url}/matches/{match_id}')).json()
+        for side in details.get('lineups', {}).values():
+            for player in side.get('first_11', []) + side.get('substitutes', []):
+                if player.get('id') is not None and str(player['id']) not in player_ids:
+                    player_ids.append(str(player['id']))
+        if len(player_ids) >= SAMPLE_SIZE:
+            break
+
+    return (
+        ['/matches']
+        + [f'/matches/{match_id}' for match_id in match_ids]
+        + [f'/players/{player_id}' for player_id in player_ids[:SAMPLE_SIZE]]
+    )
+
+
+async def compare_responses(client, paths, wsgi_url, asgi_url):
+    """Paths whose status or body differs between the two servers."""
+    mismatches = []
+    for path in paths:
+        wsgi, asgi = await asyncio.gather(client.get(f'{wsgi_url}{path}'), client.get(f'{asgi_url}{path}'))
+        if wsgi.status_code != asgi.status_code or wsgi.content != asgi.content:
+            mismatches.append(path)
+    return mismatches
+
+
+async def run_load(base_url, paths, concurrency, total_requests):
+    """
+    Send `total_requests` requests, cycling through `paths`, with `concurrency` in flight.
+
+    Returns:
+        Dictionary with throughput, latency percentiles and error count
+    """
+    latencies = []
+    errors = 0
+    next_request = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal next_request, errors
+            while next_request < total_requests:
+                path = paths[next_request % len(paths)]
+                next_request += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'errors': errors
+    }
+
+
+async def main(args):
+    async with httpx.AsyncClient(timeout=30) as client:
+        paths = await discover_paths(client, args.wsgi)
+        print(f"Benchmarking {len(paths)} paths: /matches, "
+              f"{sum(p.startswith('/matches/') for p in paths)} matches, "
+              f"{sum(p.startswith('/players/') for p in paths)} players")
+
+        mismatches = await compare_responses(client, paths, args.wsgi, args.asgi)
+        if mismatches:
+            print(f"Responses differ for {len(mismatches)} paths, e.g. {mismatches[:5]}")
+        else:
+            print("Responses are identical on both servers")
+
+    results = {}
+    for name, base_url in (('WSGI', args.wsgi), ('ASGI', args.asgi)):
+        print(f"\nRunning {args.requests} requests against {name} ({base_url}), concurrency {args.concurrency}...")
+        results[name] = await run_load(base_url, paths, args.concurrency, args.requests)
+
+    print(f"\n{'Server':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<6} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>7}")
+    print(f"\nASGI / WSGI throughput: {results['ASGI']['rps'] / results['WSGI']['rps']:.2f}x")
+
+    return not mismatches
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--wsgi', default='http://127.0.0.1:5000', help='Base URL of the Flask worker')
+    parser.add_argument('--asgi', default='http://127.0.0.1:8000', help='Base URL of the ASGI worker')
+    parser.add_argument('--concurrency', type=int, default=200, help='Requests in flight')
+    parser.add_argument('--requests', type=int, default=5000, help='Requests per server')
+    if not asyncio.run(main(parser.parse_args())):
+        sys.exit(1)
@@ -0,0 +1,128 @@
+"""EasyCoach API client with an on-disk response cache and offline replay."""
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+# Parameters that identify the caller rather than the resource
+UNCACHED_PARAMS = {'user_token'}
+
+
+class OfflineCacheMiss(Exception):
+    """Raised in offline mode when a request was never recorded."""
+
+
+class EasyCoachClient:
+    """
+    Fetches JSON from the EasyCoach API, recording every response on disk.
+
+    Only successful responses (2xx, with an "ok" status in the body) are
+    recorded. Cached responses are revalidated with If-None-Match/
+    If-Modified-Since when the upstream sent an ETag or Last-Modified, and
+    reused as-is while younger than `max_age` seconds. In offline mode the
+    network is never touched and only recorded responses are served.
+    """
+
+    def __init__(self, base_url, user_token, cache_dir=None, offline=False, max_age=0, timeout=10):
+        """Initialize the client; a falsy `cache_dir` disables caching."""
+        self.base_url = base_url
+        self.user_token = user_token
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.max_age = max_age
+        self.timeout = timeout
+
+        if offline and not cache_dir:
+            raise ValueError("Offline mode needs a cache directory to replay from")
+
+    def _cache_path(self, endpoint, params):
+        """Cache file for an endpoint and its identifying parameters."""
+        key_params = {k: v for k, v in params.items() if k not in UNCACHED_PARAMS}
+        key = json.dumps([endpoint, key_params], sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, endpoint.strip('/') or 'root', f"{digest}.json")
+
+    def _load(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, path, endpoint, params, body, etag=None, last_modified=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            'endpoint': endpoint,
+            'params': {k: v for k, v in params.items() if k not in UNCACHED_PARAMS},
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'body': body
+        }
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.{id(entry)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get(self, endpoint, params=None):
+        """
+        GET an endpoint and return its decoded JSON body.
+
+        Args:
+            endpoint: Path relative to the API base URL, e.g. "/league"
+            params: Query parameters; the user token is added automatically
+
+        Returns:
+            The decoded JSON response
+        """
+        params = dict(params or {})
+        params['user_token'] = self.user_token
+
+        if not self.cache_dir:
+            response = requests.get(self.base_url + endpoint, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+
+        path = self._cache_path(endpoint, params)
+        cached = self._load(path)
+
+        if self.offline:
+            if cached is None:
+                raise OfflineCacheMiss(f"No recorded response for {endpoint} {params.get('match_id') or ''}".strip())
+            return cached['body']
+
+        if cached is not None and time.time() - cached.get('fetched_at', 0) < self.max_age:
+            return cached['body']
+
+        # Ask the upstream whether our copy is still current
+        headers = {}
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        response = requests.get(self.base_url + endpoint, params=params, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and cached is not None:
+            self._store(
+                path, endpoint, params, cached['body'],
+                etag=response.headers.get('ETag', cached.get('etag')),
+                last_modified=response.headers.get('Last-Modified', cached.get('last_modified'))
+            )
+            return cached['body']
+
+        response.raise_for_status()
+        body = response.json()
+
+        # Errors are returned to the caller but never replayed
+        if 200 <= response.status_code < 300 and isinstance(body, dict) and body.get('status') == 'ok':
+            self._store(
+                path, endpoint, params, body,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return body
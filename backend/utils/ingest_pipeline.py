@@ -0,0 +1,505 @@
+"""Single-pass ingest: build matches and players in one flow through pipeline stages.
+
+    fetch -> normalize -> write matches -> aggregate appearances -> write players
+
+Each stage runs in its own thread(s) and hands items to the next one through a
+bounded queue, so every match is fetched, stored and counted towards its
+players' stats exactly once, while the next matches are still downloading.
+Player stats are aggregated as matches stream through, but player documents
+are only written once the last match is in: until then, readers see the new
+matches next to the previous run's players. This replaces running
+populate_db.py followed by populate_players.py without re-reading the
+matches collection; populate_db.py itself runs only the match stages.
+
+Usage: python utils/ingest_pipeline.py [--offline]
+"""
+import backend_path  # noqa: F401  (puts backend/ on sys.path for `storage`)
+import os
+import queue
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from pymongo import ReplaceOne
+
+from easycoach_client import OfflineCacheMiss
+from populate_db import (
+    EASYCOACH_OFFLINE,
+    INGEST_WORKERS,
+    LEAGUE_SEASONS,
+    build_breakdown_match_doc,
+    build_match_doc,
+    db,
+    ensure_indexes,
+    fetch_match_details,
+    fetch_matches_from_api,
+    find_breakdown_files,
+    shared_leagues,
+    load_breakdown_json,
+    prepare_for_storage
+)
+from populate_players import add_match_appearances, sort_matches_played
+from storage.compact import EVENTS_PROJECTION, events_size_filter, expand_events, expand_match
+from storage.meta import stamp_ingest_version
+
+# Items buffered between two stages
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 64))
+
+# Documents per bulk write in the match and player write stages
+WRITE_BATCH_SIZE = int(os.environ.get('PIPELINE_WRITE_BATCH_SIZE', 100))
+
+# End-of-input marker passed down the queues
+DONE = object()
+
+# Fetch stage input for the stored matches of leagues not being ingested
+OTHER_LEAGUES = object()
+
+
+class Stage(ABC):
+    """
+    One step of the pipeline.
+
+    `process` is called once per input item and passes results on with
+    `emit(item)`; `finish` runs once after the last item, for stages that
+    buffer (batched writes, aggregations). Stages with `workers > 1` must
+    be safe to call from several threads.
+    """
+    name = 'stage'
+    workers = 1
+
+    @abstractmethod
+    def process(self, item, emit):
+        """Handle one input item."""
+
+    def finish(self, emit):
+        pass
+
+
+class StageMetrics:
+    """Timing and input queue depth of one stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth):
+        with self.lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.depth_max = max(self.depth_max, depth)
+
+    def record(self, seconds):
+        with self.lock:
+            self.items_in += 1
+            self.busy_seconds += seconds
+
+    def emitted(self):
+        with self.lock:
+            self.items_out += 1
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'in': self.items_in,
+            'out': self.items_out,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'queue_avg': round(self.depth_total / self.depth_samples, 1) if self.depth_samples else 0,
+            'queue_max': self.depth_max
+        }
+
+
+class Pipeline:
+    """Run stages concurrently, connected by bounded queues."""
+
+    def __init__(self, stages, queue_size=PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.metrics = [StageMetrics(stage.name) for stage in stages]
+        self.remaining = [stage.workers for stage in stages]
+        self.lock = threading.Lock()
+        self.aborted = threading.Event()
+        self.errors = []
+
+    def _emitter(self, index):
+        metrics = self.metrics[index]
+        if index + 1 == len(self.stages):
+            return lambda item: metrics.emitted()
+
+        outbox = self.queues[index + 1]
+
+        def emit(item):
+            metrics.emitted()
+            outbox.put(item)
+        return emit
+
+    def _abort(self, stage, error):
+        print(f"Stage {stage.name} failed: {error}")
+        with self.lock:
+            self.errors.append((stage.name, error))
+        self.aborted.set()
+
+    def _work(self, index):
+        stage = self.stages[index]
+        metrics = self.metrics[index]
+        inbox = self.queues[index]
+        emit = self._emitter(index)
+
+        while True:
+            metrics.sample_depth(inbox.qsize())
+            item = inbox.get()
+            if item is DONE:
+                break
+            # After a failure keep draining, so upstream stages never block
+            if self.aborted.is_set():
+                continue
+
+            started = time.perf_counter()
+            try:
+                stage.process(item, emit)
+            except Exception as e:
+                self._abort(stage, e)
+            metrics.record(time.perf_counter() - started)
+
+        with self.lock:
+            self.remaining[index] -= 1
+            last_worker = self.remaining[index] == 0
+        if not last_worker:
+            return
+
+        if not self.aborted.is_set():
+            started = time.perf_counter()
+            try:
+                stage.finish(emit)
+            except Exception as e:
+                self._abort(stage, e)
+            with metrics.lock:
+                metrics.busy_seconds += time.perf_counter() - started
+
+        if index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                self.queues[index + 1].put(DONE)
+
+    def run(self, items):
+        """
+        Feed items to the first stage and wait for every stage to finish.
+
+        Returns:
+            True if no stage failed
+        """
+        threads = [
+            threading.Thread(target=self._work, args=(index,), name=f'{stage.name}-{worker}', daemon=True)
+            for index, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        for item in items:
+            self.queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            self.queues[0].put(DONE)
+
+        for thread in threads:
+            thread.join()
+
+        return not self.errors
+
+    def report(self):
+        """Print per-stage metrics."""
+        print(f"\n{'Stage':<12} {'in':>7} {'out':>7} {'busy s':>9} {'queue avg':>10} {'queue max':>10}")
+        for metrics in self.metrics:
+            m = metrics.as_dict()
+            print(f"{m['stage']:<12} {m['in']:>7} {m['out']:>7} {m['busy_seconds']:>9.2f} {m['queue_avg']:>10} {m['queue_max']:>10}")
+
+
+class FetchStage(Stage):
+    """
+    (league_id, season_id) -> raw API and breakdown matches, one league per worker.
+
+    A league that cannot be fetched (no match list, or a match missing
+    from the offline recording) keeps its stored matches; they are passed
+    on as-is so its players are still aggregated. So are the stored matches
+    of leagues not being ingested (the OTHER_LEAGUES item), since players
+    are built from the whole matches collection.
+    """
+    name = 'fetch'
+
+    def __init__(self, workers, league_seasons):
+        self.workers = workers
+        self.league_seasons = list(league_seasons)
+        # Leagues ingested for several seasons (see find_breakdown_files)
+        self.shared_leagues = shared_leagues(self.league_seasons)
+        self.errors = {}
+
+    def _keep_stored(self, league_id, season_id, emit, error, emitted_ids=()):
+        """Fail a league: pass on its stored matches except those already re-fetched."""
+        self.errors[(league_id, season_id)] = error
+        query = {'league_id': league_id, 'season_id': season_id, '_id': {'$nin': list(emitted_ids)}}
+        for stored in db.matches.find(query):
+            emit({'kind': 'stored', 'doc': stored})
+        emit({'kind': 'league_done', 'league_id': league_id, 'season_id': season_id, 'ok': False})
+
+    def process(self, item, emit):
+        if item is OTHER_LEAGUES:
+            ingested = [{'league_id': league_id, 'season_id': season_id} for league_id, season_id in self.league_seasons]
+            for stored in db.matches.find({'$nor': ingested} if ingested else {}):
+                emit({'kind': 'stored', 'doc': stored})
+            return
+
+        league_id, season_id = item
+
+        api_matches = fetch_matches_from_api(league_id, season_id)
+        if not api_matches:
+            self._keep_stored(league_id, season_id, emit, f"No matches returned for league {league_id}, season {season_id}")
+            return
+
+        # Breakdown JSON replaces the API version of a match entirely
+        breakdowns = {}
+        api_match_ids = [match.get('game_id') for match in api_matches]
+        shared_league = league_id in self.shared_leagues
+        for match_id, breakdown_file in find_breakdown_files(league_id, season_id, api_match_ids, shared_league).items():
+            breakdown_data = load_breakdown_json(breakdown_file)
+            if breakdown_data:
+                breakdowns[match_id] = breakdown_data
+
+        emitted_ids = []
+        for match in api_matches:
+            match_id = match.get('game_id')
+            if not match_id or str(match_id) in breakdowns:
+                continue
+            try:
+                details = fetch_match_details(match_id)
+            except OfflineCacheMiss as e:
+                # Matches emitted so far are fresh and get written; the rest stay as stored
+                self._keep_stored(league_id, season_id, emit, str(e), emitted_ids)
+                return
+            emit({
+                'kind': 'api',
+                'league_id': league_id,
+                'season_id': season_id,
+                'match': match,
+                'details': details
+            })
+            emitted_ids.append(match_id)
+
+        for match_id, breakdown_data in breakdowns.items():
+            emit({
+                'kind': 'breakdown',
+                'league_id': league_id,
+                'season_id': season_id,
+                'match_id': match_id,
+                'breakdown': breakdown_data
+            })
+
+        emit({'kind': 'league_done', 'league_id': league_id, 'season_id': season_id, 'ok': True})
+
+
+class NormalizeStage(Stage):
+    """Raw matches -> match documents in the verbose shape."""
+    name = 'normalize'
+
+    def process(self, item, emit):
+        # The API has no events: those posted to a stored match are kept (see MatchWriteStage)
+        if item['kind'] == 'api':
+            doc = build_match_doc(item['match'], item['details'], item['league_id'], item['season_id'])
+            emit({'kind': 'match', 'doc': doc, 'store': True, 'keep_events': True})
+        elif item['kind'] == 'breakdown':
+            doc = build_breakdown_match_doc(item['match_id'], item['breakdown'], item['league_id'], item['season_id'])
+            emit({'kind': 'match', 'doc': doc, 'store': True, 'keep_events': False})
+        elif item['kind'] == 'stored':
+            emit({'kind': 'match', 'doc': expand_match(item['doc']), 'store': False})
+        else:
+            emit(item)
+
+
+class MatchWriteStage(Stage):
+    """
+    Upsert match documents in batches and prune stale ones per league.
+
+    API matches keep the events stored for them (posted to
+    POST /matches/<id>/events), and are passed on with those events so the
+    players count them too. Breakdown matches replace their events.
+    """
+    name = 'write_match'
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.batch = []
+        self.written_ids = {}
+        self.results = {}
+
+    def _write(self, items):
+        """Replace the documents of `items`; returns the items to write again."""
+        keep_ids = [item['doc']['_id'] for item in items if item['keep_events']]
+        stored = {}
+        if keep_ids:
+            stored = {match['_id']: match for match in db.matches.find({'_id': {'$in': keep_ids}}, EVENTS_PROJECTION)}
+
+        requests = []
+        guarded = []
+        for item in items:
+            doc = item['doc']
+            current = stored.get(doc['_id']) if item['keep_events'] else None
+            if current is None:
+                requests.append(ReplaceOne({'_id': doc['_id']}, prepare_for_storage(doc), upsert=True))
+                continue
+            # Only replace the events read above: an event posted meanwhile makes this match nothing
+            doc['events'] = expand_events(current)
+            requests.append(ReplaceOne({'_id': doc['_id'], **events_size_filter(current)}, prepare_for_storage(doc)))
+            guarded.append(item)
+
+        result = db.matches.bulk_write(requests, ordered=False)
+        if result.matched_count + result.upserted_count < len(requests):
+            return guarded
+        return []
+
+    def _flush(self, emit):
+        items, self.batch = self.batch, []
+        retry = items
+        while retry:
+            retry = self._write(retry)
+        for item in items:
+            emit(item['doc'])
+
+    def process(self, item, emit):
+        if item['kind'] == 'league_done':
+            key = (item['league_id'], item['season_id'])
+            if not item['ok']:
+                return
+
+            # Remove matches that are no longer part of this league season
+            self._flush(emit)
+            written_ids = self.written_ids.pop(key, [])
+            removed = db.matches.delete_many({
+                'league_id': item['league_id'],
+                'season_id': item['season_id'],
+                '_id': {'$nin': written_ids}
+            }).deleted_count
+            self.results[key] = {'matches': len(set(written_ids)), 'removed': removed}
+            return
+
+        doc = item['doc']
+        if not item['store']:
+            emit(doc)
+            return
+
+        self.batch.append(item)
+        self.written_ids.setdefault((doc['league_id'], doc['season_id']), []).append(doc['_id'])
+        if len(self.batch) >= self.batch_size:
+            self._flush(emit)
+
+    def finish(self, emit):
+        self._flush(emit)
+
+
+class AppearanceStage(Stage):
+    """Match documents -> aggregated player documents."""
+    name = 'appearances'
+
+    def __init__(self):
+        self.players = {}
+
+    def process(self, item, emit):
+        add_match_appearances(self.players, item)
+
+    def finish(self, emit):
+        sort_matches_played(self.players)
+        for player in self.players.values():
+            emit(player)
+
+
+class PlayerWriteStage(Stage):
+    """Upsert player documents in batches and drop players no match references."""
+    name = 'write_player'
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.batch = []
+        self.player_ids = []
+
+    def _flush(self):
+        if self.batch:
+            db.players.bulk_write(self.batch, ordered=False)
+            self.batch = []
+
+    def process(self, item, emit):
+        self.batch.append(ReplaceOne({'_id': item['_id']}, item, upsert=True))
+        self.player_ids.append(item['_id'])
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+        emit(item)
+
+    def finish(self, emit):
+        self._flush()
+        db.players.delete_many({'_id': {'$nin': self.player_ids}})
+
+
+def run_ingest(league_seasons=None, workers=None, players=True):
+    """
+    Ingest matches and players in a single pass.
+
+    Args:
+        league_seasons: (league_id, season_id) pairs to ingest
+        workers: Leagues fetched concurrently
+        players: Also rebuild the players; False runs only the match stages
+
+    Returns:
+        True if every league season was ingested and no stage failed
+    """
+    league_seasons = league_seasons or LEAGUE_SEASONS
+    workers = workers or INGEST_WORKERS
+
+    ensure_indexes()
+
+    fetch = FetchStage(workers=max(1, min(workers, len(league_seasons))), league_seasons=league_seasons)
+    write_match = MatchWriteStage()
+    write_player = PlayerWriteStage()
+    stages = [fetch, NormalizeStage(), write_match]
+    items = list(league_seasons)
+    if players:
+        stages += [AppearanceStage(), write_player]
+        items.append(OTHER_LEAGUES)
+    pipeline = Pipeline(stages)
+
+    started = time.perf_counter()
+    completed = pipeline.run(items)
+    elapsed = time.perf_counter() - started
+
+    print("\nPer-league results:")
+    for league_id, season_id in sorted(league_seasons):
+        key = (league_id, season_id)
+        if key in fetch.errors:
+            print(f"- League {league_id}, season {season_id}: FAILED ({fetch.errors[key]}), stored matches kept")
+        elif key in write_match.results:
+            result = write_match.results[key]
+            print(f"- League {league_id}, season {season_id}: {result['matches']} matches, {result['removed']} removed")
+
+    pipeline.report()
+    print(f"\nIngest took {elapsed:.1f}s")
+
+    if not completed:
+        print("Ingest aborted; stale players were not pruned and the ingest version was not updated")
+        return False
+
+    total_matches = db.matches.count_documents({})
+    print(f"Total matches in database: {total_matches}")
+    if players:
+        stamp_ingest_version(db, players=len(write_player.player_ids))
+        print(f"Total players in database: {db.players.count_documents({})}")
+    else:
+        stamp_ingest_version(db, matches=total_matches)
+
+    return not fetch.errors
+
+if __name__ == '__main__':
+    print("Starting single-pass ingest..." + (" (offline replay)" if EASYCOACH_OFFLINE else ""))
+    succeeded = run_ingest()
+    print("\nIngest complete!")
+    if not succeeded:
+        sys.exit(1)
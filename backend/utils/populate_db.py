@@ -1,10 +1,17 @@
 """Script to populate MongoDB with matches and players data."""
-import requests
+from backend_path import BACKEND_DIR  # first: puts backend/ on sys.path for `storage`
+import glob
 import json
 import os
-from pymongo import MongoClient
+import re
+import sys
+from collections import Counter
+from pymongo import ASCENDING, DESCENDING, MongoClient
 from datetime import datetime
 from dotenv import load_dotenv
+from easycoach_client import EasyCoachClient, OfflineCacheMiss
+from storage.compact import encode_match
+from storage.meta import stamp_ingest_version
 
 # Load environment variables
 load_dotenv()
@@ -20,29 +27,63 @@ EASYCOACH_API_URL = os.environ.get('EASYCOACH_API_URL', '')
 LEAGUE = "/league"
 MATCH = "/match"
 
-DEFAULT_PARAMS = {
-    'league_id': 726,
-    'season_id': 26,
-    'user_token': os.environ.get('EASYCOACH_API_TOKEN', '')
-}
+USER_TOKEN = os.environ.get('EASYCOACH_API_TOKEN', '')
+
+# Recorded API responses, keyed by endpoint and parameters. With --offline (or
+# EASYCOACH_OFFLINE=1) the database is rebuilt from them without network access.
+EASYCOACH_CACHE_DIR = os.environ.get('EASYCOACH_CACHE_DIR', os.path.join(BACKEND_DIR, '.easycoach_cache'))
+EASYCOACH_OFFLINE = '--offline' in sys.argv or os.environ.get('EASYCOACH_OFFLINE') == '1'
+
+api_client = EasyCoachClient(
+    EASYCOACH_API_URL,
+    USER_TOKEN,
+    cache_dir=EASYCOACH_CACHE_DIR,
+    offline=EASYCOACH_OFFLINE,
+    max_age=int(os.environ.get('EASYCOACH_CACHE_MAX_AGE', 0))
+)
+
+def parse_league_seasons(value):
+    """Parse "726:26,727:26" into [(726, 26), (727, 26)]."""
+    pairs = []
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        league_id, season_id = item.split(':')
+        pairs.append((int(league_id), int(season_id)))
+    return pairs
 
-def fetch_matches_from_api():
-    """Fetch all matches from the API."""
+# (league, season) pairs to ingest, e.g. EASYCOACH_LEAGUES="726:26,727:26"
+LEAGUE_SEASONS = parse_league_seasons(os.environ.get('EASYCOACH_LEAGUES', '726:26'))
+
+# Number of leagues ingested concurrently
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 4))
+
+# Store lineups/events in the compact encoding (see storage/compact.py)
+COMPACT_STORAGE = os.environ.get('COMPACT_STORAGE') == '1'
+
+def prepare_for_storage(match_doc):
+    """Encode a match document the way it is configured to be stored."""
+    return encode_match(match_doc) if COMPACT_STORAGE else match_doc
+
+def fetch_matches_from_api(league_id, season_id):
+    """Fetch all matches of a league season from the API."""
     try:
-        print("Fetching matches from API...")
-        response = requests.get(EASYCOACH_API_URL + LEAGUE, params=DEFAULT_PARAMS, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        print(f"Fetching matches for league {league_id}, season {season_id} from API...")
+        params = {
+            'league_id': league_id,
+            'season_id': season_id
+        }
+        data = api_client.get(LEAGUE, params)
         
         if data.get('status') != 'ok':
             print(f"API returned error status: {data}")
             return []
         
         matches = data.get('matches', [])
-        print(f"Fetched {len(matches)} matches from API")
+        print(f"Fetched {len(matches)} matches for league {league_id}, season {season_id}")
         return matches
     except Exception as e:
-        print(f"Error fetching matches: {e}")
+        print(f"Error fetching matches for league {league_id}, season {season_id}: {e}")
         return []
 
 def fetch_match_details(match_id):
@@ -50,36 +91,69 @@ def fetch_match_details(match_id):
     try:
         print(f"Fetching details for match {match_id}...")
         params = {
-            'match_id': match_id,
-            'user_token': DEFAULT_PARAMS['user_token']
+            'match_id': match_id
         }
-        response = requests.get(EASYCOACH_API_URL + MATCH, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = api_client.get(MATCH, params)
         
         if data.get('status') != 'ok':
             print(f"API returned error for match {match_id}")
             return None
         
         return data
+    except OfflineCacheMiss:
+        # Fail the league instead of storing the match without lineups
+        raise
     except Exception as e:
         print(f"Error fetching match {match_id} details: {e}")
         return None
 
-def load_breakdown_json():
-    """Load the breakdown JSON file for match 1061429."""
-    try:
-        # JSON file is at backend root level (one level up from utils/)
-        backend_dir = os.path.dirname(os.path.dirname(__file__))
-        breakdown_file = os.path.join(backend_dir, 'breakdown_game_1061429_league_726.json')
-        
-        if os.path.exists(breakdown_file):
-            print("Loading breakdown JSON for match 1061429...")
-            with open(breakdown_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+# Video URLs for matches whose breakdown JSON has no usable video of its own
+BREAKDOWN_VIDEO_URLS = {
+    '1061429': 'https://dn3dopmbo1yw3.cloudfront.net/ifaLeagues/68f7f50964d66d80d7584b32/venue_hls/pano_hls/pano_hls.m3u8'
+}
+
+def shared_leagues(league_seasons):
+    """Ids of the leagues ingested for more than one season."""
+    counts = Counter(league_id for league_id, _ in league_seasons)
+    return {league_id for league_id, count in counts.items() if count > 1}
+
+def find_breakdown_files(league_id, season_id, api_match_ids, shared_league=False):
+    """
+    Find the breakdown JSON files of one league season, keyed by match id.
+    
+    `breakdown_game_<match>_league_<league>_season_<season>.json` belongs to
+    that season. A file without a season belongs to the season whose API
+    match list contains the match, or to the league's only ingested season;
+    otherwise it is skipped rather than counted once per season.
+    """
+    # JSON files are at backend root level (one level up from utils/)
+    def glob_matches(suffix):
+        pattern = os.path.join(BACKEND_DIR, f'breakdown_game_*_league_{league_id}{suffix}.json')
+        for path in glob.glob(pattern):
+            found = re.search(r'breakdown_game_(\d+)_league_', os.path.basename(path))
+            if found:
+                yield found.group(1), path
+    
+    api_match_ids = {str(match_id) for match_id in api_match_ids}
+    
+    # A season-specific file wins over one without a season
+    files = dict(glob_matches(f'_season_{season_id}'))
+    for match_id, path in glob_matches(''):
+        if match_id in files:
+            continue
+        if match_id in api_match_ids or not shared_league:
+            files[match_id] = path
         else:
-            print(f"Breakdown file not found: {breakdown_file}")
-            return None
+            print(f"Skipping {os.path.basename(path)} for season {season_id}: league {league_id} "
+                  f"has several seasons and this one does not list the match")
+    return files
+
+def load_breakdown_json(breakdown_file):
+    """Load a breakdown JSON file."""
+    try:
+        print(f"Loading breakdown JSON {os.path.basename(breakdown_file)}...")
+        with open(breakdown_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
     except Exception as e:
         print(f"Error loading breakdown JSON: {e}")
         return None
@@ -210,226 +284,246 @@ def extract_events_from_breakdown(breakdown_data):
     events.sort(key=lambda x: x.get('minute', 0))
     return events
 
-def populate_matches():
-    """Populate matches collection from API and breakdown JSON."""
-    matches_collection = db.matches
+def ensure_indexes():
+    """Create the indexes the API relies on for filtering and team lookups."""
+    db.matches.create_index([
+        ('league_id', ASCENDING),
+        ('season_id', ASCENDING),
+        ('match_info.match_date', ASCENDING)
+    ])
+    # Team form and head-to-head: a team's matches, newest first
+    db.matches.create_index([
+        ('match_info.home_team.id', ASCENDING),
+        ('match_info.kickoff_time', DESCENDING)
+    ])
+    db.matches.create_index([
+        ('match_info.away_team.id', ASCENDING),
+        ('match_info.kickoff_time', DESCENDING)
+    ])
+
+def build_match_doc(match, match_details, league_id, season_id):
+    """
+    Normalize an API match (and its details, if they were fetched) into a match document.
     
-    # Clear existing matches
-    print("Clearing existing matches...")
-    matches_collection.delete_many({})
+    Args:
+        match: Match entry from the league endpoint
+        match_details: Response of the match endpoint, or None
+        league_id: League the match belongs to
+        season_id: Season the match belongs to
     
-    # Fetch matches from API
-    api_matches = fetch_matches_from_api()
+    Returns:
+        Match document in the verbose shape
+    """
+    match_id = match.get('game_id')
     
-    for match in api_matches:
-        match_id = match.get('game_id')
-        if not match_id:
-            continue
-        
-        # Parse date and time
-        date_str = match.get('date')  # Format: "17/08/24"
-        time_str = match.get('hour')  # Format: "08:30"
-        
-        match_date = None
-        kickoff_datetime = None
-        
-        if date_str:
-            try:
-                date_obj = datetime.strptime(date_str, '%d/%m/%y')
-                match_date = date_obj.strftime('%Y-%m-%d')
-                if time_str:
-                    kickoff_datetime = f"{match_date}T{time_str}:00"
-                else:
-                    kickoff_datetime = f"{match_date}T00:00:00"
-            except ValueError:
-                match_date = date_str
-                kickoff_datetime = date_str
-        
-        # Parse scores
-        home_score = None
-        away_score = None
-        result = match.get('result')
-        if result and '-' in str(result):
-            try:
-                scores = str(result).split('-')
-                home_score = int(scores[0].strip())
-                away_score = int(scores[1].strip())
-            except (ValueError, IndexError):
-                pass
-        
-        # Fetch detailed match data
-        match_details = fetch_match_details(match_id)
-        
-        lineups = {'home': {'first_11': [], 'substitutes': []}, 'away': {'first_11': [], 'substitutes': []}}
-        pixellot_id = None
-        
-        if match_details:
-            teams = match_details.get('teams', [])
-            home_team_data = teams[0] if len(teams) > 0 else {}
-            away_team_data = teams[1] if len(teams) > 1 else {}
-            
-            # Extract lineups
-            for player in home_team_data.get('players', []):
-                player_info = {
-                    'id': player.get('player_id'),
-                    'name': player.get('player_name', 'Unknown'),
-                    'name_en': player.get('player_name_en'),
-                    'shirt_number': int(player.get('shirt_number', 0)),
-                    'position': 'GK' if player.get('goalkeeper') == '1' else None,
-                    'captain': player.get('captain') == '1'
-                }
-                if player.get('main') == '1':
-                    lineups['home']['first_11'].append(player_info)
-                else:
-                    lineups['home']['substitutes'].append(player_info)
-            
-            for player in away_team_data.get('players', []):
-                player_info = {
-                    'id': player.get('player_id'),
-                    'name': player.get('player_name', 'Unknown'),
-                    'name_en': player.get('player_name_en'),
-                    'shirt_number': int(player.get('shirt_number', 0)),
-                    'position': 'GK' if player.get('goalkeeper') == '1' else None,
-                    'captain': player.get('captain') == '1'
-                }
-                if player.get('main') == '1':
-                    lineups['away']['first_11'].append(player_info)
-                else:
-                    lineups['away']['substitutes'].append(player_info)
-            
-            # Extract video URL
-            video_data = match_details.get('match_details', {}).get('video', {})
-            video_url = video_data.get('pano_hls')
-            if video_url and 'cloudfront' in video_url:
-                pixellot_id = video_url
-        
-        # Create match document
-        match_doc = {
-            '_id': match_id,
-            'match_info': {
-                'id': match_id,
-                'home_team': {
-                    'id': match.get('team_a_id'),
-                    'name': match.get('team_a_name_en') or match.get('team_a_name', 'Unknown'),
-                    'logo': None
-                },
-                'away_team': {
-                    'id': match.get('team_b_id'),
-                    'name': match.get('team_b_name_en') or match.get('team_b_name', 'Unknown'),
-                    'logo': None
-                },
-                'kickoff_time': kickoff_datetime,
-                'competition_name': match.get('fixture_name_en') or match.get('fixture_name', 'Unknown'),
-                'home_score': home_score,
-                'away_score': away_score,
-                'status': match.get('status', 'Scheduled'),
-                'stadium': match.get('stadium_name_en') or match.get('stadium_name'),
-                'match_date': match_date,
-                'pixellot_id': pixellot_id
-            },
-            'lineups': lineups,
-            'events': []
-        }
-        
-        # Insert match
-        matches_collection.insert_one(match_doc)
-        print(f"Inserted match {match_id}: {match_doc['match_info']['home_team']['name']} vs {match_doc['match_info']['away_team']['name']}")
+    # Parse date and time
+    date_str = match.get('date')  # Format: "17/08/24"
+    time_str = match.get('hour')  # Format: "08:30"
     
-    # Handle match 1061429 with breakdown JSON
-    breakdown_data = load_breakdown_json()
-    if breakdown_data:
-        match_id = '1061429'
-        
-        # Extract events
-        events = extract_events_from_breakdown(breakdown_data)
-        
-        # Create lineups from breakdown
-        lineups = {'home': {'first_11': [], 'substitutes': []}, 'away': {'first_11': [], 'substitutes': []}}
+    match_date = None
+    kickoff_datetime = None
+    
+    if date_str:
+        try:
+            date_obj = datetime.strptime(date_str, '%d/%m/%y')
+            match_date = date_obj.strftime('%Y-%m-%d')
+            if time_str:
+                kickoff_datetime = f"{match_date}T{time_str}:00"
+            else:
+                kickoff_datetime = f"{match_date}T00:00:00"
+        except ValueError:
+            match_date = date_str
+            kickoff_datetime = date_str
+    
+    # Parse scores
+    home_score = None
+    away_score = None
+    result = match.get('result')
+    if result and '-' in str(result):
+        try:
+            scores = str(result).split('-')
+            home_score = int(scores[0].strip())
+            away_score = int(scores[1].strip())
+        except (ValueError, IndexError):
+            pass
+    
+    lineups = {'home': {'first_11': [], 'substitutes': []}, 'away': {'first_11': [], 'substitutes': []}}
+    pixellot_id = None
+    
+    if match_details:
+        teams = match_details.get('teams', [])
+        home_team_data = teams[0] if len(teams) > 0 else {}
+        away_team_data = teams[1] if len(teams) > 1 else {}
         
-        for player in breakdown_data.get('home_team_players', []):
+        # Extract lineups
+        for player in home_team_data.get('players', []):
             player_info = {
                 'id': player.get('player_id'),
-                'name': f"{player.get('fname', '')} {player.get('lname', '')}".strip(),
-                'shirt_number': int(player.get('number', 0)),
-                'position': player.get('position'),
-                'captain': False,
-                'game_time': player.get('game_time')  # Real minutes played
+                'name': player.get('player_name', 'Unknown'),
+                'name_en': player.get('player_name_en'),
+                'shirt_number': int(player.get('shirt_number', 0)),
+                'position': 'GK' if player.get('goalkeeper') == '1' else None,
+                'captain': player.get('captain') == '1'
             }
-            if player.get('is_sub') == 0:
+            if player.get('main') == '1':
                 lineups['home']['first_11'].append(player_info)
             else:
                 lineups['home']['substitutes'].append(player_info)
         
-        for player in breakdown_data.get('away_team_players', []):
+        for player in away_team_data.get('players', []):
             player_info = {
                 'id': player.get('player_id'),
-                'name': f"{player.get('fname', '')} {player.get('lname', '')}".strip(),
-                'shirt_number': int(player.get('number', 0)),
-                'position': player.get('position'),
-                'captain': False,
-                'game_time': player.get('game_time')  # Real minutes played
+                'name': player.get('player_name', 'Unknown'),
+                'name_en': player.get('player_name_en'),
+                'shirt_number': int(player.get('shirt_number', 0)),
+                'position': 'GK' if player.get('goalkeeper') == '1' else None,
+                'captain': player.get('captain') == '1'
             }
-            if player.get('is_sub') == 0:
+            if player.get('main') == '1':
                 lineups['away']['first_11'].append(player_info)
             else:
                 lineups['away']['substitutes'].append(player_info)
         
-        # Parse match date
-        match_date_str = breakdown_data.get('match_date', '2025-10-25 10:00:00')
-        try:
-            match_dt = datetime.strptime(match_date_str, '%Y-%m-%d %H:%M:%S')
-            kickoff_datetime = match_dt.isoformat()
-            match_date = match_dt.strftime('%Y-%m-%d')
-        except:
-            kickoff_datetime = match_date_str
-            match_date = '2025-10-25'
-        
-        home_label = breakdown_data.get('home_label', 'Home Team').replace('&#039;', "'")
-        away_label = breakdown_data.get('away_label', 'Away Team').replace('&#039;', "'")
-        
-        # Create match document
-        match_doc = {
-            '_id': match_id,
-            'match_info': {
-                'id': match_id,
-                'home_team': {
-                    'id': breakdown_data.get('home_team_id'),
-                    'name': home_label,
-                    'logo': None
-                },
-                'away_team': {
-                    'id': breakdown_data.get('away_team_id'),
-                    'name': away_label,
-                    'logo': None
-                },
-                'kickoff_time': kickoff_datetime,
-                'competition_name': 'League 726',
-                'home_score': breakdown_data.get('home_team_score', 0),
-                'away_score': breakdown_data.get('away_team_score', 0),
-                'status': 'Finished',
-                'stadium': None,
-                'match_date': match_date,
-                'pixellot_id': 'https://dn3dopmbo1yw3.cloudfront.net/ifaLeagues/68f7f50964d66d80d7584b32/venue_hls/pano_hls/pano_hls.m3u8'
+        # Extract video URL
+        video_data = match_details.get('match_details', {}).get('video', {})
+        video_url = video_data.get('pano_hls')
+        if video_url and 'cloudfront' in video_url:
+            pixellot_id = video_url
+    
+    # Create match document
+    match_doc = {
+        '_id': match_id,
+        'league_id': league_id,
+        'season_id': season_id,
+        'match_info': {
+            'id': match_id,
+            'home_team': {
+                'id': match.get('team_a_id'),
+                'name': match.get('team_a_name_en') or match.get('team_a_name', 'Unknown'),
+                'logo': None
             },
-            'lineups': lineups,
-            'events': events,
-            'breakdown_data': {
-                'first_half_start': breakdown_data.get('first_half_start'),
-                'second_half_start': breakdown_data.get('second_half_start')
-            }
+            'away_team': {
+                'id': match.get('team_b_id'),
+                'name': match.get('team_b_name_en') or match.get('team_b_name', 'Unknown'),
+                'logo': None
+            },
+            'kickoff_time': kickoff_datetime,
+            'competition_name': match.get('fixture_name_en') or match.get('fixture_name', 'Unknown'),
+            'home_score': home_score,
+            'away_score': away_score,
+            'status': match.get('status', 'Scheduled'),
+            'stadium': match.get('stadium_name_en') or match.get('stadium_name'),
+            'match_date': match_date,
+            'pixellot_id': pixellot_id
+        },
+        'lineups': lineups,
+        'events': []
+    }
+    
+    return match_doc
+
+def build_breakdown_match_doc(match_id, breakdown_data, league_id, season_id):
+    """Build a match document, with lineups and events, from breakdown JSON."""
+    # Extract events
+    events = extract_events_from_breakdown(breakdown_data)
+    
+    # Create lineups from breakdown
+    lineups = {'home': {'first_11': [], 'substitutes': []}, 'away': {'first_11': [], 'substitutes': []}}
+    
+    for player in breakdown_data.get('home_team_players', []):
+        player_info = {
+            'id': player.get('player_id'),
+            'name': f"{player.get('fname', '')} {player.get('lname', '')}".strip(),
+            'shirt_number': int(player.get('number', 0)),
+            'position': player.get('position'),
+            'captain': False,
+            'game_time': player.get('game_time')  # Real minutes played
         }
-        
-        # Upsert (update or insert)
-        matches_collection.update_one(
-            {'_id': match_id},
-            {'$set': match_doc},
-            upsert=True
-        )
-        print(f"Updated match 1061429 with breakdown data and {len(events)} events")
+        if player.get('is_sub') == 0:
+            lineups['home']['first_11'].append(player_info)
+        else:
+            lineups['home']['substitutes'].append(player_info)
+    
+    for player in breakdown_data.get('away_team_players', []):
+        player_info = {
+            'id': player.get('player_id'),
+            'name': f"{player.get('fname', '')} {player.get('lname', '')}".strip(),
+            'shirt_number': int(player.get('number', 0)),
+            'position': player.get('position'),
+            'captain': False,
+            'game_time': player.get('game_time')  # Real minutes played
+        }
+        if player.get('is_sub') == 0:
+            lineups['away']['first_11'].append(player_info)
+        else:
+            lineups['away']['substitutes'].append(player_info)
+    
+    # Parse match date
+    match_date_str = breakdown_data.get('match_date', '2025-10-25 10:00:00')
+    try:
+        match_dt = datetime.strptime(match_date_str, '%Y-%m-%d %H:%M:%S')
+        kickoff_datetime = match_dt.isoformat()
+        match_date = match_dt.strftime('%Y-%m-%d')
+    except:
+        kickoff_datetime = match_date_str
+        match_date = '2025-10-25'
+    
+    home_label = breakdown_data.get('home_label', 'Home Team').replace('&#039;', "'")
+    away_label = breakdown_data.get('away_label', 'Away Team').replace('&#039;', "'")
+    
+    # Create match document
+    match_doc = {
+        '_id': match_id,
+        'league_id': league_id,
+        'season_id': season_id,
+        'match_info': {
+            'id': match_id,
+            'home_team': {
+                'id': breakdown_data.get('home_team_id'),
+                'name': home_label,
+                'logo': None
+            },
+            'away_team': {
+                'id': breakdown_data.get('away_team_id'),
+                'name': away_label,
+                'logo': None
+            },
+            'kickoff_time': kickoff_datetime,
+            'competition_name': f'League {league_id}',
+            'home_score': breakdown_data.get('home_team_score', 0),
+            'away_score': breakdown_data.get('away_team_score', 0),
+            'status': 'Finished',
+            'stadium': None,
+            'match_date': match_date,
+            'pixellot_id': BREAKDOWN_VIDEO_URLS.get(match_id)
+        },
+        'lineups': lineups,
+        'events': events,
+        'breakdown_data': {
+            'first_half_start': breakdown_data.get('first_half_start'),
+            'second_half_start': breakdown_data.get('second_half_start')
+        }
+    }
+    
+    return match_doc
+
+def populate_matches(league_seasons=None, workers=None):
+    """
+    Populate matches for every (league, season) pair, without rebuilding players.
+    
+    Runs the match stages of the ingest pipeline (see ingest_pipeline.py).
+    
+    Returns:
+        True if every league season was ingested successfully
+    """
+    # Imported here: the pipeline is built from this module's fetch and build helpers
+    from ingest_pipeline import run_ingest
     
-    print(f"\nTotal matches in database: {matches_collection.count_documents({})}")
+    return run_ingest(league_seasons, workers, players=False)
 
 if __name__ == '__main__':
-    print("Starting database population...")
-    populate_matches()
+    print("Starting database population..." + (" (offline replay)" if EASYCOACH_OFFLINE else ""))
+    succeeded = populate_matches()
     print("\nDatabase population complete!")
+    if not succeeded:
+        sys.exit(1)
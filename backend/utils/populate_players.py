@@ -1,9 +1,12 @@
 """Script to populate players collection by aggregating match data."""
+import backend_path  # noqa: F401  (puts backend/ on sys.path for `storage`)
 import random
 from pymongo import MongoClient
-from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+from storage.compact import expand_match
+from storage.meta import stamp_ingest_version
+from storage.skills import SKILL_CATEGORIES
 
 # Load environment variables
 load_dotenv()
@@ -14,9 +17,6 @@ MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'football_app')
 client = MongoClient(MONGO_URI)
 db = client[MONGO_DB_NAME]
 
-# Skill categories for radar charts
-SKILL_CATEGORIES = ['passing', 'dribbling', 'speed', 'strength', 'vision', 'defending']
-
 def generate_mock_skills(position=None):
     """Generate mock skill values based on position."""
     # Base skills (random 4-8)
@@ -44,37 +44,27 @@ def generate_mock_skills(position=None):
     
     return skills
 
-def populate_players():
-    """Populate players collection from matches data."""
-    matches_collection = db.matches
-    players_collection = db.players
-    
-    # Clear existing players
-    print("Clearing existing players...")
-    players_collection.delete_many({})
+def add_match_appearances(players_dict, match):
+    """
+    Add one match's appearances (and event counts) to the aggregated players.
     
-    # Dictionary to store player data
-    players_dict = {}
+    Args:
+        players_dict: Player documents keyed by player id, updated in place
+        match: Match document in the verbose shape
+    """
+    match_id = match['_id']
+    match_info = match.get('match_info', {})
+    lineups = match.get('lineups', {})
+    events = match.get('events', [])
     
-    # Fetch all matches
-    print("Fetching matches...")
-    matches = list(matches_collection.find({}))
-    print(f"Processing {len(matches)} matches...")
+    match_date = match_info.get('match_date')
     
-    for match in matches:
-        match_id = match['_id']
-        match_info = match.get('match_info', {})
-        lineups = match.get('lineups', {})
-        events = match.get('events', [])
-        
-        match_date = match_info.get('match_date')
-        
-        # Process home team
-        home_team_id = match_info.get('home_team', {}).get('id')
-        home_team_name = match_info.get('home_team', {}).get('name', 'Unknown')
-        away_team_name = match_info.get('away_team', {}).get('name', 'Unknown')
+    for side, opponent_side in (('home', 'away'), ('away', 'home')):
+        team_id = match_info.get(f'{side}_team', {}).get('id')
+        team_name = match_info.get(f'{side}_team', {}).get('name', 'Unknown')
+        opponent_name = match_info.get(f'{opponent_side}_team', {}).get('name', 'Unknown')
         
-        for player in lineups.get('home', {}).get('first_11', []) + lineups.get('home', {}).get('substitutes', []):
+        for player in lineups.get(side, {}).get('first_11', []) + lineups.get(side, {}).get('substitutes', []):
             player_id = str(player.get('id'))
             if not player_id:
                 continue
@@ -89,8 +79,8 @@ def populate_players():
                     'name': player_name,
                     'position': position,
                     'shirt_number': player.get('shirt_number'),
-                    'team_id': home_team_id,
-                    'team_name': home_team_name,
+                    'team_id': team_id,
+                    'team_name': team_name,
                     'is_captain': player.get('captain', False),
                     'matches_played': [],
                     'total_stats': {
@@ -111,17 +101,19 @@ def populate_players():
                         players_dict[player_id]['skills'] = generate_mock_skills(player.get('position'))
             
             # Add match to player's history
-            is_starting = player in lineups.get('home', {}).get('first_11', [])
+            is_starting = player in lineups.get(side, {}).get('first_11', [])
             # Only store real game_time if available (from breakdown JSON), otherwise None
             minutes_played = player.get('game_time') if player.get('game_time') is not None else None
             
             match_entry = {
                 'match_id': match_id,
                 'match_date': match_date,
-                'player_team': home_team_name,
-                'opponent': away_team_name,
-                'home_away': 'home',
+                'player_team': team_name,
+                'opponent': opponent_name,
+                'home_away': side,
                 'competition': match_info.get('competition_name', 'League'),
+                'league_id': match.get('league_id'),
+                'season_id': match.get('season_id'),
                 'minutes_played': minutes_played,
                 'started': is_starting,
                 'goals': 0,
@@ -147,92 +139,36 @@ def populate_players():
             # Only add real minutes to total
             if minutes_played is not None:
                 players_dict[player_id]['total_stats']['minutes_played'] += minutes_played
-        
-        # Process away team
-        away_team_id = match_info.get('away_team', {}).get('id')
-        away_team_name = match_info.get('away_team', {}).get('name', 'Unknown')
-        home_team_name = match_info.get('home_team', {}).get('name', 'Unknown')
-        
-        for player in lineups.get('away', {}).get('first_11', []) + lineups.get('away', {}).get('substitutes', []):
-            player_id = str(player.get('id'))
-            if not player_id:
-                continue
-            
-            # Initialize player if not exists
-            if player_id not in players_dict:
-                position = player.get('position') or 'Unknown'
-                # Use English name for profile, fallback to Hebrew if not available
-                player_name = player.get('name_en') or player.get('name', 'Unknown')
-                players_dict[player_id] = {
-                    '_id': player_id,
-                    'name': player_name,
-                    'position': position,
-                    'shirt_number': player.get('shirt_number'),
-                    'team_id': away_team_id,
-                    'team_name': away_team_name,
-                    'is_captain': player.get('captain', False),
-                    'matches_played': [],
-                    'total_stats': {
-                        'matches': 0,
-                        'goals': 0,
-                        'yellow_cards': 0,
-                        'red_cards': 0,
-                        'minutes_played': 0
-                    },
-                    'skills': generate_mock_skills(position)
-                }
-            else:
-                # Update position if we find a better one (not Unknown/None)
-                if player.get('position') and player.get('position') != 'Unknown':
-                    if players_dict[player_id]['position'] in ['Unknown', None]:
-                        players_dict[player_id]['position'] = player.get('position')
-                        # Regenerate skills with correct position
-                        players_dict[player_id]['skills'] = generate_mock_skills(player.get('position'))
-            
-            # Add match to player's history
-            is_starting = player in lineups.get('away', {}).get('first_11', [])
-            # Only store real game_time if available (from breakdown JSON), otherwise None
-            minutes_played = player.get('game_time') if player.get('game_time') is not None else None
-            
-            match_entry = {
-                'match_id': match_id,
-                'match_date': match_date,
-                'player_team': away_team_name,
-                'opponent': home_team_name,
-                'home_away': 'away',
-                'competition': match_info.get('competition_name', 'League'),
-                'minutes_played': minutes_played,
-                'started': is_starting,
-                'goals': 0,
-                'yellow_cards': 0,
-                'red_cards': 0
-            }
-            
-            # Count events for this player in this match
-            for event in events:
-                if str(event.get('player_id')) == player_id:
-                    if event['event_type'] == 'goal':
-                        match_entry['goals'] += 1
-                        players_dict[player_id]['total_stats']['goals'] += 1
-                    elif event['event_type'] == 'yellow_card':
-                        match_entry['yellow_cards'] += 1
-                        players_dict[player_id]['total_stats']['yellow_cards'] += 1
-                    elif event['event_type'] == 'red_card':
-                        match_entry['red_cards'] += 1
-                        players_dict[player_id]['total_stats']['red_cards'] += 1
-            
-            players_dict[player_id]['matches_played'].append(match_entry)
-            players_dict[player_id]['total_stats']['matches'] += 1
-            # Only add real minutes to total
-            if minutes_played is not None:
-                players_dict[player_id]['total_stats']['minutes_played'] += minutes_played
-    
-    # Sort each player's matches by date (most recent first)
+
+def sort_matches_played(players_dict):
+    """Sort each player's matches by date (most recent first)."""
     for player_data in players_dict.values():
         player_data['matches_played'].sort(
             key=lambda x: x.get('match_date') or '1900-01-01',
             reverse=True
         )
+
+def populate_players():
+    """Populate players collection from matches data."""
+    matches_collection = db.matches
+    players_collection = db.players
+    
+    # Clear existing players
+    print("Clearing existing players...")
+    players_collection.delete_many({})
+    
+    # Dictionary to store player data
+    players_dict = {}
+    
+    # Fetch all matches
+    print("Fetching matches...")
+    matches = list(matches_collection.find({}))
+    print(f"Processing {len(matches)} matches...")
+    
+    for match in matches:
+        add_match_appearances(players_dict, expand_match(match))
+    
+    sort_matches_played(players_dict)
     
     # Insert all players
     if players_dict:
@@ -251,6 +187,8 @@ def populate_players():
     print(f"- Total goals: {total_goals}")
     
     print(f"\nTotal players in database: {players_collection.count_documents({})}")
+    
+    stamp_ingest_version(db, players=len(players_dict))
 
 if __name__ == '__main__':
     print("Starting players database population...")
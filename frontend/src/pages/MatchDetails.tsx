@@ -1,9 +1,22 @@
 import { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import type { MatchDetails, MatchEvent, TabType } from '../types/match';
+import type { Match, MatchDetails, MatchEvent, TabType } from '../types/match';
 import TeamLogo from '../components/TeamLogo';
 import { matchService } from '../services/matchService';
 
+const FINISHED_STATUSES = ['finished', 'ended', 'full time', 'ft', 'cancelled', 'postponed', 'abandoned'];
+
+// A match can still be running this long after kick-off (two halves, break and stoppage time)
+const LIVE_WINDOW_MS = 3 * 60 * 60 * 1000;
+
+/** Whether a match may be in progress, i.e. worth streaming live updates for. */
+function isMatchLive(match: Match): boolean {
+  if (FINISHED_STATUSES.includes((match.status ?? '').toLowerCase())) return false;
+
+  const kickoff = new Date(match.kickoff_time).getTime();
+  const now = Date.now();
+  return !Number.isNaN(kickoff) && kickoff <= now && now - kickoff < LIVE_WINDOW_MS;
+}
 
 export default function MatchDetails() {
   const { matchId } = useParams<{ matchId: string }>();
@@ -19,6 +32,26 @@ export default function MatchDetails() {
     fetchMatchDetails();
   }, [matchId]);
 
+  const live = matchDetails ? isMatchLive(matchDetails.match_info) : false;
+
+  // Keep score and events current without refetching the whole match; only
+  // live matches are streamed, so finished ones hold no connection open
+  useEffect(() => {
+    if (!matchId || !live) return;
+
+    return matchService.streamMatch(matchId, {
+      onSnapshot: ({ score, events }) =>
+        setMatchDetails((prev) => prev && { ...prev, match_info: { ...prev.match_info, ...score }, events }),
+      onScore: (score) =>
+        setMatchDetails((prev) => prev && { ...prev, match_info: { ...prev.match_info, ...score } }),
+      onEvent: (event) =>
+        setMatchDetails((prev) => prev && {
+          ...prev,
+          events: [...prev.events.filter((e) => e.id !== event.id), event].sort((a, b) => a.minute - b.minute),
+        }),
+    });
+  }, [matchId, live]);
+
   async function fetchMatchDetails() {
     try {
       const data = await matchService.getMatchById(matchId!);
@@ -1,5 +1,5 @@
 import api from './api';
-import type { Match, MatchDetails } from '../types/match';
+import type { Match, MatchDetails, MatchEvent, MatchScore } from '../types/match';
 
 export const matchService = {
   /**
@@ -17,6 +17,26 @@ export const matchService = {
     const response = await api.get(`/matches/${matchId}`);
     return response.data;
   },
+
+  /**
+   * Subscribe to live score and event updates for a match.
+   * Returns a function that closes the stream.
+   */
+  streamMatch: (
+    matchId: string,
+    handlers: {
+      onSnapshot: (state: { score: MatchScore; events: MatchEvent[] }) => void;
+      onScore: (score: MatchScore) => void;
+      onEvent: (event: MatchEvent) => void;
+    }
+  ): (() => void) => {
+    // EventSource reconnects on its own and sends Last-Event-ID to resume
+    const source = new EventSource(`${api.defaults.baseURL}/matches/${matchId}/stream`);
+    source.addEventListener('snapshot', (e) => handlers.onSnapshot(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener('score', (e) => handlers.onScore(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener('event', (e) => handlers.onEvent(JSON.parse((e as MessageEvent).data)));
+    return () => source.close();
+  },
 };
 
 export default matchService;
@@ -8,6 +8,7 @@ interface Match {
   home_score: number;
   away_score: number;
   kickoff_time: string;
+  status?: string;
   competition_name: string;
   stadium: string;
   pixellot_id?: string;
@@ -29,6 +30,12 @@ interface MatchEvent {
   video_timestamp?: number;
 }
 
+interface MatchScore {
+  home_score: number;
+  away_score: number;
+  status: string;
+}
+
 interface MatchEventsProps {
   videoUrl?: string;
   events: MatchEvent[];
@@ -51,4 +58,4 @@ interface MatchDetails {
 
 type TabType = 'lineups' | 'events';
 
-export type { Match, MatchesByDay, MatchEvent, MatchEventsProps, MatchDetails, TabType };
\ No newline at end of file
+export type { Match, MatchesByDay, MatchEvent, MatchScore, MatchEventsProps, MatchDetails, TabType };
\ No newline at end of file